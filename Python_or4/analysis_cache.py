@@ -0,0 +1,187 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import unidecode
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_message(text):
+    """
+    Clé de cache d'un message : sans accents, en minuscules, espaces regroupés
+    ("Qu'est-ce que  l'IA ?" et "qu'est-ce que l'ia ?" partagent la même entrée).
+    """
+    return WHITESPACE_PATTERN.sub(" ", unidecode.unidecode(text).casefold()).strip()
+
+
+def analysis_generation(signatures, model_version, data_hash):
+    """
+    Génération des résultats d'analyse : empreinte des signatures disque des
+    fichiers lus par l'analyse, de la version du modèle de langue et de l'artefact
+    du classificateur. Elle change dès que l'un d'eux change.
+    """
+    state = (signatures, model_version, data_hash)
+    return hashlib.sha1(repr(state).encode("utf-8")).hexdigest()[:16]
+
+
+class LocalBackend:
+    """
+    Stockage partagé de remplacement, en mémoire du processus (développement, tests).
+    Même interface que RedisBackend : get(key) et set(key, value, ttl) sur des chaînes.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+
+
+class RedisBackend:
+    """
+    Stockage partagé par tous les workers. Le paquet redis n'est requis que si
+    ce stockage est configuré.
+    """
+
+    def __init__(self, url, prefix="spacy:analysis:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+
+class AnalysisCache:
+    """
+    Cache LRU borné, avec durée de vie, des résultats d'analyse.
+
+    Chaque entrée est associée à une génération (base de connaissances et version
+    du modèle) : dès qu'une génération plus récente est demandée, le cache local
+    est vidé et les anciennes entrées partagées ne sont plus jamais lues. Les
+    résultats renvoyés sont partagés et ne doivent pas être modifiés.
+    """
+
+    def __init__(self, max_size=10000, ttl=3600.0, backend=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._generation = None
+        self._hits = 0
+        self._backend_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._backend_errors = 0
+        self._lock = threading.Lock()
+
+    def _key(self, text, generation):
+        return f"{generation}:{normalize_message(text)}"
+
+    def _check_generation(self, generation):
+        # Appelé sous verrou : une nouvelle génération invalide toutes les entrées locales
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, text, generation):
+        key = self._key(text, generation)
+        now = time.monotonic()
+        with self._lock:
+            self._check_generation(generation)
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+
+        value = self._backend_get(key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._backend_hits += 1
+            self._store(key, value, generation, now)
+        return value
+
+    def put(self, text, generation, value):
+        key = self._key(text, generation)
+        with self._lock:
+            self._check_generation(generation)
+            self._store(key, value, generation, time.monotonic())
+        self._backend_set(key, value)
+
+    def _store(self, key, value, generation, now):
+        if generation != self._generation or self.max_size <= 0:
+            return
+        self._entries[key] = (value, now + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _backend_get(self, key):
+        if self.backend is None:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            return self._backend_failed(e)
+        return json.loads(value) if value is not None else None
+
+    def _backend_set(self, key, value):
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, json.dumps(value, ensure_ascii=False), self.ttl)
+        except Exception as e:
+            self._backend_failed(e)
+
+    def _backend_failed(self, error):
+        # Le stockage partagé est facultatif : une panne le rend simplement inutile
+        with self._lock:
+            self._backend_errors += 1
+        print(f"Erreur du cache partagé: {error}")
+        return None
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._backend_hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "backend_hits": self._backend_hits,
+                "misses": self._misses,
+                "hit_ratio": (self._hits + self._backend_hits) / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "backend_errors": self._backend_errors
+            }
@@ -0,0 +1,141 @@
+import re
+import numpy as np
+from collections import Counter
+from functools import cached_property
+
+# Catégories grammaticales retenues comme mots-clés
+KEYWORD_POS = ["NOUN", "VERB", "PROPN", "ADJ", "PRON"]
+# Mots toujours conservés, même s'ils sont marqués comme stop words
+FORCED_KEYWORDS = ["potins", "numériques"]
+# Expressions interrogatives : leur présence fait passer le texte prétraité en minuscules
+QUESTION_KEYWORDS = ["c'est quoi", "qu'est-ce que", "qu'est ce que", "quel", "comment"]
+# Termes retenus pour le TF-IDF (même motif que le token_pattern de scikit-learn)
+TERM_PATTERN = re.compile(r"\w\w+")
+
+
+def cosine_similarity(vec1, vec2):
+    """
+    Similarité cosinus entre deux vecteurs, 0.0 si l'un d'eux est nul.
+    """
+    norm = np.linalg.norm(vec1) * np.linalg.norm(vec2)
+    if norm == 0:
+        return 0.0
+    return float(np.dot(vec1, vec2) / norm)
+
+
+def token_terms(token):
+    """
+    Termes sous lesquels un token peut correspondre à un mot-clé : lemme et forme
+    en minuscules, hors stop words et termes trop courts.
+    """
+    return {
+        term for term in (token.lemma_.lower(), token.lower_)
+        if TERM_PATTERN.fullmatch(term) and (term in FORCED_KEYWORDS or not token.vocab[term].is_stop)
+    }
+
+
+class AnalysisContext:
+    """
+    Analyse d'un message utilisateur : le pipeline spaCy n'est exécuté qu'une
+    seule fois, et le même Doc fournit le texte prétraité, les mots-clés
+    candidats, les entités et les vecteurs.
+    """
+
+    def __init__(self, nlp, text, doc=None):
+        self.nlp = nlp
+        self.text = text or ""
+        self.doc = doc if doc is not None else nlp(self.text)
+        # Conserver les expressions interrogatives pour éviter de perdre du contexte
+        lowered = self.text.lower()
+        self.lowercase = any(keyword in lowered for keyword in QUESTION_KEYWORDS)
+
+    def is_stop(self, token):
+        # Les stop words ajoutés au vocabulaire sont en minuscules
+        return token.is_stop or self.nlp.vocab[token.lower_].is_stop
+
+    @cached_property
+    def tokens(self):
+        """
+        Tokens conservés après filtrage des stop words.
+        """
+        return [
+            token for token in self.doc
+            if not self.is_stop(token) or token.lower_ in FORCED_KEYWORDS
+        ]
+
+    @cached_property
+    def processed_text(self):
+        if self.lowercase:
+            return ' '.join(token.lower_ for token in self.tokens)
+        return ' '.join(token.text for token in self.tokens)
+
+    @cached_property
+    def candidate_keywords(self):
+        """
+        Lemmes des tokens conservés dont la catégorie est pertinente, sans doublons.
+        """
+        keywords = []
+        for token in self.tokens:
+            if token.lower_ in FORCED_KEYWORDS:
+                lemma = token.lower_
+            elif token.pos_ in KEYWORD_POS:
+                lemma = token.lemma_.lower()
+            else:
+                continue
+            if TERM_PATTERN.fullmatch(lemma) and lemma not in keywords:
+                keywords.append(lemma)
+
+        # Forcer l'ajout des mots "potins" et "numériques" s'ils apparaissent dans le texte original
+        lowered = self.text.lower()
+        for word in FORCED_KEYWORDS:
+            if word in lowered and word not in keywords:
+                keywords.append(word)
+        return keywords
+
+    @cached_property
+    def term_counts(self):
+        """
+        Nombre d'occurrences de chaque terme du texte prétraité (pour le TF-IDF).
+        """
+        counts = Counter()
+        for token in self.tokens:
+            counts.update(token_terms(token))
+        return counts
+
+    @cached_property
+    def term_sequence(self):
+        """
+        Formes (lemme, texte en minuscules) de chaque token du message, ponctuation exclue,
+        pour la reconnaissance des mots-clés d'intention.
+        """
+        return [
+            {token.lemma_.lower(), token.lower_}
+            for token in self.doc if not token.is_punct and not token.is_space
+        ]
+
+    @property
+    def terms(self):
+        return set(self.term_counts)
+
+    @cached_property
+    def entities(self):
+        return [(ent.text, ent.label_) for ent in self.doc.ents]
+
+    @cached_property
+    def vector(self):
+        """
+        Vecteur moyen du texte prétraité (équivalent de nlp(processed_text).vector).
+        """
+        if not self.tokens:
+            return np.zeros((self.nlp.vocab.vectors_length,), dtype="float32")
+        if self.lowercase:
+            vectors = [self.nlp.vocab[token.lower_].vector for token in self.tokens]
+        else:
+            vectors = [token.vector for token in self.tokens]
+        return np.mean(vectors, axis=0)
+
+    def keyword_vector(self, keyword):
+        return self.nlp.vocab.get_vector(keyword)
+
+    def keyword_similarity(self, keyword):
+        return cosine_similarity(self.keyword_vector(keyword), self.vector)
@@ -0,0 +1,34 @@
+# python analyze_stream.py questions.ndjson > resultats.ndjson
+# Réanalyse hors ligne d'un journal de questions, résultats en NDJSON.
+# Outil en lecture seule : start_background() n'est pas appelé, aucun fichier de la base
+# (corpus, statistiques, regroupements) n'est réécrit
+import argparse
+import sys
+
+from spacy_serviceV7 import ANALYZE_BATCH_SIZE, analyze_stream, wait_until_ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse en flux d'un fichier de questions (une par ligne, texte ou JSON).")
+    parser.add_argument("input", nargs="?", default="-", help="fichier d'entrée, '-' pour l'entrée standard")
+    parser.add_argument("--batch-size", type=int, default=ANALYZE_BATCH_SIZE, help="nombre de lignes analysées par lot")
+    args = parser.parse_args()
+
+    # Les messages de diagnostic du service partent sur stderr pour ne pas polluer le NDJSON
+    output = sys.stdout
+    sys.stdout = sys.stderr
+
+    wait_until_ready()
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    try:
+        for line in analyze_stream(source, max(1, args.batch_size)):
+            output.write(line)
+            output.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,540 @@
+# python benchmark.py --corpus-sizes 1000,10000,100000 --output bench.json
+# python benchmark.py --launch --workers 2 --concurrency 8      (gunicorn lancé sur le corpus synthétique)
+# python benchmark.py --url http://127.0.0.1:5000               (service déjà démarré)
+# python benchmark.py --baseline bench_avant.json --output bench_apres.json
+# Mesure débit, latences (p50/p95/p99) et mémoire maximale des routes du service
+# sur des corpus de questions synthétiques ; le rapport JSON se compare d'un commit à l'autre
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+DATA_DIRECTORY = os.path.join(SOURCE_DIRECTORY, "..", "public", "base")
+# Fichiers de la base de connaissances copiés tels quels dans l'espace de travail
+DATA_FILES = ["intents_and_responses.json", "glossary.json", "clusters.json", "statistics.json"]
+# Travail de fond du service sans rapport avec les routes mesurées : regroupement des
+# questions désactivé, statistiques d'usage fusionnées à l'arrêt seulement
+SERVICE_ENVIRONMENT = {"SPACY_CLUSTERING": "0", "SPACY_STATISTICS_FLUSH": "86400"}
+DEFAULT_ENDPOINTS = ["analyze_context", "analyze_combined", "calculate_relationships", "related_keywords", "glossary"]
+
+# Gabarits de questions par intention ; les intentions inconnues utilisent GENERIC_TEMPLATES
+TEMPLATES = {
+    "IA_definition": ["Qu'est-ce que {subject} {context} {qualifier} ?", "Peux-tu définir {subject} {context} {qualifier} ?"],
+    "IA_fonctionnement": ["Comment fonctionne {subject} {context} {qualifier} ?", "Comment marche {subject} {context} {qualifier} ?"],
+    "IA_applications": ["Quelles sont les applications de {subject} {context} {qualifier} ?", "À quoi sert {subject} {context} {qualifier} ?"],
+    "IA_avantages_risques": ["Quels sont les risques de {subject} {context} {qualifier} ?", "Quels avantages apporte {subject} {context} {qualifier} ?"],
+    "IA_comparaison": ["Quelle différence entre {subject} et {other} {context} {qualifier} ?"],
+    "IA_importance": ["Pourquoi {subject} est important {context} {qualifier} ?"],
+    "potins_ateliers": ["Quels ateliers sur {subject} proposent les Potins Numériques {context} {qualifier} ?"],
+    "potins_definition": ["Que font les Potins Numériques autour de {subject} {context} {qualifier} ?"],
+}
+GENERIC_TEMPLATES = ["Peux-tu m'expliquer {subject} {context} {qualifier} ?"]
+SUBJECTS = [
+    "l'intelligence artificielle", "l'apprentissage automatique", "le deep learning", "un réseau de neurones",
+    "le traitement du langage", "un algorithme", "les données personnelles", "un modèle génératif",
+    "la vision par ordinateur", "la reconnaissance vocale", "un chatbot", "la robotique", "le big data",
+    "l'analyse prédictive", "un biais algorithmique", "la cybersécurité", "le cloud", "l'informatique quantique",
+    "la traduction automatique", "un assistant vocal", "la voiture autonome", "la recommandation de contenus",
+    "l'apprentissage par renforcement", "la classification d'images", "un moteur de recherche",
+    "la détection de fraude", "la santé numérique", "l'éthique des algorithmes", "la domotique", "un capteur connecté",
+]
+CONTEXTS = [
+    "", "dans la santé", "à l'école", "dans l'industrie", "pour les entreprises", "dans la vie quotidienne",
+    "pour les seniors", "dans les médias", "en agriculture", "dans les transports", "pour l'environnement",
+    "dans la finance", "au travail", "pour les associations", "dans la culture", "dans le commerce",
+    "pour la sécurité", "dans l'administration", "pour les enfants", "dans le sport",
+]
+QUALIFIERS = [
+    "", "aujourd'hui", "concrètement", "en pratique", "selon toi", "simplement", "en 2024",
+    "pour un débutant", "en quelques mots", "exactement", "à l'avenir", "en France",
+]
+KEYWORDS = [
+    "intelligence", "artificielle", "apprentissage", "données", "algorithme", "réseau", "neurone", "modèle",
+    "langage", "vision", "robot", "atelier", "numérique", "internet", "sécurité", "santé", "école", "entreprise",
+    "image", "voix", "traduction", "recherche", "calcul", "ordinateur", "logiciel", "information", "prédiction",
+    "analyse", "automatique", "éthique", "biais", "capteur", "voiture", "cloud", "quantique", "fraude",
+    "recommandation", "classification", "statistique", "probabilité", "mathématiques", "programme", "code",
+    "développeur", "utilisateur", "application", "téléphone", "formation", "science", "innovation",
+]
+
+
+def synthetic_corpus(size, intents, seed):
+    """
+    `size` questions distinctes, réparties sur les intentions, tirées de façon reproductible.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    seen = set()
+    attempts = 0
+    while len(corpus) < size:
+        intent = intents[len(corpus) % len(intents)]
+        template = rng.choice(TEMPLATES.get(intent, GENERIC_TEMPLATES))
+        subject, other = rng.sample(SUBJECTS, 2)
+        text = template.format(subject=subject, other=other, context=rng.choice(CONTEXTS), qualifier=rng.choice(QUALIFIERS))
+        text = " ".join(text.split())
+        attempts += 1
+        if text in seen:
+            if attempts < size * 20:
+                continue
+            # Combinaisons épuisées : numéroter pour garder des textes distincts
+            text = f"{text[:-2]} (variante {len(corpus)}) ?"
+        seen.add(text)
+        corpus.append({"text": text, "intent": intent})
+    return corpus
+
+
+def prepare_workspace(directory, corpus):
+    """
+    Arborescence isolée reproduisant celle du projet : <directory>/public/base contient
+    les données réelles et le corpus synthétique, <directory>/Python_or4 sert de
+    répertoire de travail au service (chemins relatifs ../public/base).
+    """
+    data = os.path.join(directory, "public", "base")
+    work = os.path.join(directory, "Python_or4")
+    os.makedirs(data)
+    os.makedirs(work)
+    for name in DATA_FILES:
+        source = os.path.join(DATA_DIRECTORY, name)
+        if os.path.exists(source):
+            shutil.copy(source, data)
+    with open(os.path.join(data, "intents_and_questions.json"), "w", encoding="utf-8") as f:
+        json.dump(corpus, f, ensure_ascii=False)
+    return work
+
+
+class InProcessClient:
+    """
+    Service importé dans le processus du benchmark et appelé via le client de test Flask.
+    """
+
+    def __init__(self, work_directory):
+        os.chdir(work_directory)
+        sys.path.insert(0, SOURCE_DIRECTORY)
+        started = time.perf_counter()
+        import spacy_serviceV7
+        self.service = spacy_serviceV7
+        spacy_serviceV7.wait_until_ready()
+        # Le benchmark sert lui-même les requêtes : threads d'arrière-plan d'un worker
+        spacy_serviceV7.start_background()
+        self.startup_seconds = time.perf_counter() - started
+        self.app = spacy_serviceV7.app
+        self._local = threading.local()
+
+    def request(self, method, path, payload=None):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=payload)
+        return response.status_code, response.get_json(silent=True)
+
+    def peak_rss_mb(self):
+        # ru_maxrss est exprimé en kilo-octets sous Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def close(self):
+        # Écrire maintenant ce que le service écrirait à la sortie du processus,
+        # quand l'espace de travail aura déjà été supprimé
+        self.service.unknown_questions.stop()
+        self.service.live_statistics.stop()
+
+
+class HttpClient:
+    """
+    Service joignable en HTTP ; avec `process`, la mémoire de ce processus et de ses
+    workers est relevée pendant toute la mesure.
+    """
+
+    def __init__(self, base_url, process=None, startup_seconds=None):
+        import requests
+
+        self.requests = requests
+        self.base_url = base_url.rstrip("/")
+        self.process = process
+        self.startup_seconds = startup_seconds
+        self._local = threading.local()
+        self._peak_rss = 0
+        self._stop = threading.Event()
+        if process is not None:
+            threading.Thread(target=self._watch_memory, daemon=True).start()
+
+    def request(self, method, path, payload=None):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self.requests.Session()
+        response = session.request(method, self.base_url + path, json=payload, timeout=600)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+    def _watch_memory(self):
+        while not self._stop.wait(0.5):
+            self._peak_rss = max(self._peak_rss, process_tree_rss_kb(self.process.pid))
+
+    def peak_rss_mb(self):
+        if self.process is None:
+            return None
+        return self._peak_rss / 1024
+
+    def close(self):
+        self._stop.set()
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=60)
+
+
+def process_tree_rss_kb(pid):
+    """
+    Somme des RSS d'un processus et de ses descendants (les pages partagées entre
+    le maître et les workers sont comptées pour chacun).
+    """
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r") as f:
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(name))
+
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        except OSError:
+            continue
+    return total
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def launch_server(work_directory, workers, threads, train_epochs, timeout=900):
+    """
+    Démarre gunicorn (gunicorn.conf.py) dans l'espace de travail et attend /readyz.
+    """
+    import requests
+
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": SOURCE_DIRECTORY,
+        "SPACY_BIND": f"127.0.0.1:{port}",
+        "SPACY_WORKERS": str(workers),
+        "SPACY_THREADS": str(threads),
+        "SPACY_TRAIN_EPOCHS": str(train_epochs),
+        **SERVICE_ENVIRONMENT,
+    })
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(SOURCE_DIRECTORY, "gunicorn.conf.py"), "spacy_serviceV7:app"],
+        cwd=work_directory, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Le serveur gunicorn s'est arrêté pendant le démarrage.")
+        try:
+            if requests.get(base_url + "/readyz", timeout=5).status_code == 200:
+                return HttpClient(base_url, process, time.perf_counter() - started)
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    process.wait(timeout=60)
+    raise TimeoutError("Le serveur gunicorn n'est pas prêt.")
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {}
+    values = np.asarray(latencies) * 1000
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "mean": round(float(values.mean()), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def run_scenario(client, name, requests_list, concurrency, params=None):
+    """
+    Envoie les requêtes (méthode, chemin, corps) avec `concurrency` clients simultanés.
+    """
+    def timed(item):
+        method, path, payload = item
+        started = time.perf_counter()
+        status, _ = client.request(method, path, payload)
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed, requests_list))
+    duration = time.perf_counter() - started
+
+    latencies = [latency for latency, status in outcomes if status < 400]
+    statuses = {}
+    for _, status in outcomes:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "scenario": name,
+        "params": params or {},
+        "requests": len(outcomes),
+        "errors": len(outcomes) - len(latencies),
+        "statuses": statuses,
+        "duration_seconds": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2) if duration > 0 else None,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def run_train(client, poll_interval=1.0):
+    """
+    Lance un entraînement et mesure la réponse de /train puis la durée du job.
+    """
+    started = time.perf_counter()
+    status, body = client.request("POST", "/train")
+    queued = time.perf_counter() - started
+    result = {"scenario": "train", "params": {}, "status": status, "enqueue_ms": round(queued * 1000, 3)}
+    if status >= 400 or not body or "job_id" not in body:
+        result["error"] = body
+        return result
+    while True:
+        _, job = client.request("GET", f"/train/{body['job_id']}")
+        if job and job.get("status") in ("completed", "failed"):
+            break
+        time.sleep(poll_interval)
+    result.update({
+        "job_status": job["status"],
+        "epochs": job.get("epochs"),
+        "job_seconds": round(time.perf_counter() - started, 3),
+        "losses": job.get("losses"),
+    })
+    return result
+
+
+def run_benchmark(client, corpus, args):
+    rng = random.Random(args.seed)
+    texts = [entry["text"] for entry in corpus]
+    glossary_terms = []
+    glossary_path = os.path.join(DATA_DIRECTORY, "glossary.json")
+    if os.path.exists(glossary_path):
+        with open(glossary_path, "r", encoding="utf-8") as f:
+            glossary_terms = list(json.load(f).get("terms", {}))
+
+    results = []
+    for endpoint in args.endpoints:
+        if endpoint == "analyze_context":
+            items = [("POST", "/analyze_context", {"message": rng.choice(texts)}) for _ in range(args.requests)]
+            results.append(run_scenario(client, endpoint, items, args.concurrency))
+        elif endpoint == "analyze_combined":
+            items = [("POST", "/analyze_combined", {"message": rng.choice(texts)}) for _ in range(args.requests)]
+            results.append(run_scenario(client, endpoint, items, args.concurrency))
+        elif endpoint == "calculate_relationships":
+            for size in args.keyword_sizes:
+                items = [
+                    ("POST", "/calculate_relationships", {"keywords": rng.sample(KEYWORDS, min(size, len(KEYWORDS)))})
+                    for _ in range(args.requests)
+                ]
+                results.append(run_scenario(client, endpoint, items, args.concurrency, {"keywords": size}))
+        elif endpoint == "related_keywords":
+            items = [("POST", "/related_keywords", {"keyword": rng.choice(KEYWORDS)}) for _ in range(args.requests)]
+            results.append(run_scenario(client, endpoint, items, args.concurrency))
+        elif endpoint == "glossary":
+            terms = glossary_terms or ["IA"]
+            items = [("POST", "/glossary", {"term": rng.choice(terms)}) for _ in range(args.requests)]
+            results.append(run_scenario(client, endpoint, items, args.concurrency))
+        elif endpoint == "train":
+            results.append(run_train(client))
+        else:
+            raise ValueError(f"Route inconnue : {endpoint}")
+
+    _, cache = client.request("GET", "/cache/stats")
+    return {
+        "corpus_size": len(corpus),
+        "startup_seconds": round(client.startup_seconds, 3) if client.startup_seconds is not None else None,
+        "peak_rss_mb": round(client.peak_rss_mb(), 1) if client.peak_rss_mb() is not None else None,
+        "cache": cache,
+        "scenarios": results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=SOURCE_DIRECTORY, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_intents():
+    with open(os.path.join(DATA_DIRECTORY, "intents_and_responses.json"), "r", encoding="utf-8") as f:
+        return list(json.load(f).get("intents", {})) or ["unknown"]
+
+
+def run_size(size, args):
+    """
+    Mesure pour une taille de corpus, dans un espace de travail temporaire.
+    """
+    corpus = synthetic_corpus(size, load_intents(), args.seed)
+    if args.url:
+        client = HttpClient(args.url)
+        return run_benchmark(client, corpus, args)
+
+    directory = tempfile.mkdtemp(prefix="spacy-bench-")
+    try:
+        work = prepare_workspace(directory, corpus)
+        if args.launch:
+            client = launch_server(work, args.workers, args.threads, args.train_epochs)
+        else:
+            os.environ["SPACY_TRAIN_EPOCHS"] = str(args.train_epochs)
+            os.environ.update(SERVICE_ENVIRONMENT)
+            client = InProcessClient(work)
+        try:
+            return run_benchmark(client, corpus, args)
+        finally:
+            client.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run_size_in_subprocess(size, args):
+    """
+    Chaque taille en mode in-process tourne dans son propre processus : le service
+    n'est importé qu'une fois par processus et la mémoire maximale reste propre à la taille.
+    """
+    fd, output = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        command = [
+            sys.executable, os.path.abspath(__file__),
+            "--corpus-sizes", str(size),
+            "--requests", str(args.requests),
+            "--concurrency", str(args.concurrency),
+            "--keyword-sizes", ",".join(map(str, args.keyword_sizes)),
+            "--endpoints", ",".join(args.endpoints),
+            "--seed", str(args.seed),
+            "--train-epochs", str(args.train_epochs),
+            "--output", output,
+        ]
+        subprocess.run(command, check=True, stdout=sys.stderr)
+        with open(output, "r", encoding="utf-8") as f:
+            return json.load(f)["runs"][0]
+    finally:
+        os.remove(output)
+
+
+def compare(report, baseline):
+    """
+    Écarts de débit et de p95 par rapport à un rapport précédent.
+    """
+    def index(data):
+        return {
+            (run["corpus_size"], scenario["scenario"], json.dumps(scenario.get("params", {}), sort_keys=True)): scenario
+            for run in data["runs"] for scenario in run["scenarios"]
+        }
+
+    previous = index(baseline)
+    rows = []
+    for key, scenario in index(report).items():
+        before = previous.get(key)
+        if not before or "throughput_rps" not in scenario or not before.get("throughput_rps"):
+            continue
+        rows.append({
+            "corpus_size": key[0],
+            "scenario": key[1],
+            "params": json.loads(key[2]),
+            "throughput_ratio": round(scenario["throughput_rps"] / before["throughput_rps"], 3),
+            "p95_ratio": round(scenario["latency_ms"]["p95"] / before["latency_ms"]["p95"], 3) if before["latency_ms"].get("p95") else None,
+        })
+    return {"baseline_commit": baseline.get("meta", {}).get("commit"), "rows": rows}
+
+
+def int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des routes du service NLP.")
+    parser.add_argument("--corpus-sizes", type=int_list, default=[1000], help="tailles du corpus synthétique, ex. 1000,10000,100000")
+    parser.add_argument("--requests", type=int, default=200, help="requêtes par scénario")
+    parser.add_argument("--concurrency", type=int, default=1, help="clients simultanés")
+    parser.add_argument("--keyword-sizes", type=int_list, default=[5, 20, 50], help="tailles des listes de mots-clés")
+    parser.add_argument("--endpoints", type=lambda value: value.split(","), default=DEFAULT_ENDPOINTS,
+                        help="routes mesurées (ajouter 'train' pour mesurer l'entraînement)")
+    parser.add_argument("--seed", type=int, default=42, help="graine du corpus et des requêtes")
+    parser.add_argument("--train-epochs", type=int, default=2, help="époques d'entraînement pour le scénario train")
+    parser.add_argument("--url", help="service déjà démarré (le corpus du service n'est pas remplacé)")
+    parser.add_argument("--launch", action="store_true", help="mesure en HTTP via gunicorn lancé sur le corpus synthétique")
+    parser.add_argument("--workers", type=int, default=2, help="workers gunicorn (avec --launch)")
+    parser.add_argument("--threads", type=int, default=4, help="threads par worker gunicorn (avec --launch)")
+    parser.add_argument("--baseline", help="rapport précédent à comparer")
+    parser.add_argument("--output", help="fichier du rapport JSON (sortie standard par défaut)")
+    args = parser.parse_args()
+
+    # Les messages de diagnostic du service partent sur stderr pour ne pas polluer le rapport
+    output = sys.stdout
+    sys.stdout = sys.stderr
+
+    in_process = not args.url and not args.launch
+    if in_process and len(args.corpus_sizes) > 1:
+        runs = [run_size_in_subprocess(size, args) for size in args.corpus_sizes]
+    else:
+        runs = [run_size(size, args) for size in args.corpus_sizes]
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "mode": "url" if args.url else "http" if args.launch else "in-process",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "runs": runs,
+    }
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        output.write(payload + "\n")
+
+
+if __name__ == "__main__":
+    main()
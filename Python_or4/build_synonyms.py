@@ -0,0 +1,29 @@
+# python build_synonyms.py ../public/base/synonyms_fr.json
+# Précalcule la table des synonymes français utilisée par get_synonyms
+# (nécessite nltk et les corpus wordnet et omw-1.4 : python -m nltk.downloader wordnet omw-1.4)
+import argparse
+import json
+
+import spacy
+from nltk.corpus import wordnet
+
+from keyword_vectors import KeywordVectors
+from synonym_table import MIN_SYNONYM_SIMILARITY, SYNONYMS_PER_KEYWORD, build_synonym_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construit la table des synonymes français à partir de WordNet/OMW.")
+    parser.add_argument("output", nargs="?", default="../public/base/synonyms_fr.json", help="fichier JSON produit")
+    parser.add_argument("--limit", type=int, default=SYNONYMS_PER_KEYWORD, help="synonymes conservés par mot")
+    parser.add_argument("--min-similarity", type=float, default=MIN_SYNONYM_SIMILARITY, help="similarité minimale avec le mot")
+    args = parser.parse_args()
+
+    keyword_vectors = KeywordVectors(spacy.load("fr_core_news_md"))
+    table = build_synonym_table(wordnet, keyword_vectors, args.limit, args.min_similarity)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"{len(table['synonyms'])} mots écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import fcntl
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from neighbour_index import spherical_kmeans
+from question_journal import write_json_atomic
+
+VERSION_PATTERN = re.compile(r"^(\d+)\.json$")
+
+
+def unit(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def question_vector(*vectors):
+    """
+    Représentation d'une question : somme des vecteurs fournis (question, mots-clés)
+    ramenés à la même norme, pour qu'aucun ne domine.
+    """
+    return unit(np.sum([unit(np.asarray(vector, dtype="float32")) for vector in vectors], axis=0))
+
+
+def corpus_hash(texts):
+    return hashlib.sha1("\n".join(texts).encode("utf-8")).hexdigest()
+
+
+class ClusterEngine:
+    """
+    Regroupement des questions du corpus par k-moyennes en mini-lots.
+
+    Quand des questions s'ajoutent, seules leurs représentations sont calculées
+    et chaque centroïde avance vers ses nouvelles questions d'un pas inversement
+    proportionnel à son effectif. Le nombre de groupes suit la taille du corpus ;
+    quand il change, ou si des questions ont été retirées, le regroupement est
+    recalculé entièrement.
+
+    Chaque résultat est un instantané versionné : <directory>/versions/<n>.json
+    (groupes, mots-clés, questions) et <n>.npz (centroïdes et effectifs, pour
+    reprendre depuis n'importe quel processus), recopié dans current.json, puis
+    le fichier d'exploration ({libellé: mots-clés}). Un verrou de fichier
+    garantit qu'un seul processus publie à la fois.
+    """
+
+    def __init__(self, analyzer, corpus, directory, output_file, keep=10, max_clusters=50,
+                 keywords_per_cluster=8, interval=30.0, seed=0):
+        # analyzer : reçoit une liste de textes et renvoie, pour chacun, (mots-clés, vecteur)
+        self.analyzer = analyzer
+        # corpus : renvoie la liste des questions, le même objet tant que le fichier ne change pas
+        self.corpus = corpus
+        self.directory = directory
+        self.output_file = output_file
+        self.keep = keep
+        self.max_clusters = max_clusters
+        self.keywords_per_cluster = keywords_per_cluster
+        self.interval = interval
+        self.seed = seed
+        self._features = {}
+        self._corpus = None
+        self._started = False
+        self._reset()
+
+    def _reset(self):
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def versions_directory(self):
+        return os.path.join(self.directory, "versions")
+
+    def cluster_count(self, n_questions):
+        if n_questions == 0:
+            return 0
+        return max(1, min(n_questions, self.max_clusters, round(math.sqrt(n_questions / 2))))
+
+    def current(self):
+        """
+        Dernier instantané publié, None s'il n'y en a pas.
+        """
+        try:
+            with open(os.path.join(self.directory, "current.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def start(self):
+        """
+        Lance le thread qui suit le corpus et republie les groupes quand il change.
+        """
+        if self._started:
+            return
+        self._started = True
+        threading.Thread(target=self._run_loop, name="cluster-engine", daemon=True).start()
+
+    def after_fork(self):
+        started = self._started
+        self._started = False
+        self._reset()
+        if started:
+            self.start()
+
+    def _run_loop(self):
+        while True:
+            try:
+                self.update()
+            except (OSError, ValueError) as e:
+                print(f"Erreur lors du regroupement des questions: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def update(self):
+        """
+        Publie un nouvel instantané si le corpus a changé depuis le dernier ;
+        renvoie l'instantané publié, None sinon.
+        """
+        corpus = self.corpus()
+        if corpus is self._corpus:
+            return None
+        texts = list(dict.fromkeys(text for text in corpus if text))
+        digest = corpus_hash(texts)
+        current = self.current()
+        if current is not None and current.get("corpus_hash") == digest:
+            self._corpus = corpus
+            return None
+
+        os.makedirs(self.versions_directory, exist_ok=True)
+        with self._lock, open(os.path.join(self.directory, "engine.lock"), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Un autre processus regroupe déjà ce corpus
+                return None
+            try:
+                # Relire sous verrou : un autre processus a pu publier entre-temps
+                current = self.current()
+                if current is not None and current.get("corpus_hash") == digest:
+                    snapshot = None
+                else:
+                    snapshot = self._publish(self._cluster(texts, digest, current))
+                self._corpus = corpus
+                return snapshot
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _analyze(self, texts):
+        missing = [text for text in texts if text not in self._features]
+        if missing:
+            for text, (keywords, vector) in zip(missing, self.analyzer(missing)):
+                self._features[text] = (list(keywords), np.asarray(vector, dtype="float32"))
+        # Oublier les questions retirées du corpus
+        self._features = {text: self._features[text] for text in texts}
+        return self._features
+
+    def _previous_model(self, current, k, texts):
+        """
+        Centroïdes et effectifs de l'instantané précédent s'ils peuvent être
+        complétés (même nombre de groupes, aucune question retirée), avec les
+        questions à y ajouter.
+        """
+        if current is None or current.get("k") != k:
+            return None
+        previous = [question for cluster in current["clusters"] for question in cluster["questions"]]
+        previous.extend(current.get("unclustered", []))
+        if not set(previous) <= set(texts):
+            return None
+        try:
+            with np.load(os.path.join(self.versions_directory, f"{current['version']}.npz")) as state:
+                centroids, counts = state["centroids"].copy(), state["counts"].copy()
+        except (FileNotFoundError, KeyError, ValueError):
+            return None
+        known = set(previous)
+        return centroids, counts, [text for text in texts if text not in known]
+
+    def _cluster(self, texts, digest, current):
+        features = self._analyze(texts)
+        clustered = [text for text in texts if np.any(features[text][1])]
+        unclustered = [text for text in texts if not np.any(features[text][1])]
+        k = self.cluster_count(len(clustered))
+        if k == 0:
+            matrix = np.zeros((0, 0), dtype="float32")
+            centroids, counts, mode = matrix, np.zeros(0, dtype="int64"), "full"
+        else:
+            matrix = np.stack([unit(features[text][1]) for text in clustered])
+            previous = self._previous_model(current, k, texts)
+            if previous is not None:
+                centroids, counts, added = previous
+                row = {text: i for i, text in enumerate(clustered)}
+                for text in added:
+                    if text not in row:
+                        continue
+                    vector = matrix[row[text]]
+                    j = int(np.argmax(centroids @ vector))
+                    counts[j] += 1
+                    centroids[j] += (vector - centroids[j]) / counts[j]
+                    centroids[j] = unit(centroids[j])
+                mode = "incremental"
+            else:
+                centroids, assignments = spherical_kmeans(matrix, k, seed=self.seed)
+                counts = np.bincount(assignments, minlength=k).astype("int64")
+                mode = "full"
+
+        assignments = np.argmax(matrix @ centroids.T, axis=1) if k else np.zeros(0, dtype="int64")
+        members = [[] for _ in range(k)]
+        for text, cluster in zip(clustered, assignments):
+            members[cluster].append(text)
+        clusters = self._describe(members, features)
+        return {
+            "corpus_hash": digest,
+            "k": k,
+            "mode": mode,
+            "questions": len(texts),
+            "clusters": clusters,
+            "unclustered": unclustered
+        }, centroids, counts
+
+    def _describe(self, members, features):
+        """
+        Libellé et mots-clés de chaque groupe : les mots-clés fréquents dans le
+        groupe et rares dans les autres.
+        """
+        keyword_counts = [Counter(keyword for text in texts for keyword in set(features[text][0])) for texts in members]
+        spread = Counter(keyword for counts in keyword_counts for keyword in counts)
+        n_clusters = sum(1 for texts in members if texts)
+        clusters = []
+        labels = set()
+        for cluster, (texts, counts) in enumerate(zip(members, keyword_counts)):
+            if not texts:
+                continue
+            ranked = sorted(
+                counts,
+                key=lambda keyword: (-counts[keyword] * math.log(1 + n_clusters / spread[keyword]), keyword)
+            )
+            keywords = ranked[:self.keywords_per_cluster]
+            label = "_".join(keywords[:2]) or f"groupe_{cluster}"
+            if label in labels:
+                label = f"{label}_{cluster}"
+            labels.add(label)
+            clusters.append({"id": cluster, "label": label, "keywords": keywords, "size": len(texts), "questions": texts})
+        clusters.sort(key=lambda cluster: (-cluster["size"], cluster["id"]))
+        return clusters
+
+    def _publish(self, result):
+        snapshot, centroids, counts = result
+        versions = self.versions()
+        version = versions[-1] + 1 if versions else 1
+        snapshot = {"version": version, "created_at": time.time(), **snapshot}
+
+        np.savez(os.path.join(self.versions_directory, f"{version}.npz"), centroids=centroids, counts=counts)
+        write_json_atomic(os.path.join(self.versions_directory, f"{version}.json"), snapshot)
+        write_json_atomic(os.path.join(self.directory, "current.json"), snapshot)
+        # Format lu par l'explorateur : {libellé: mots-clés}
+        write_json_atomic(self.output_file, {cluster["label"]: cluster["keywords"] for cluster in snapshot["clusters"]})
+        self.prune()
+        return snapshot
+
+    def versions(self):
+        try:
+            names = os.listdir(self.versions_directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(match.group(1)) for match in map(VERSION_PATTERN.match, names) if match)
+
+    def prune(self):
+        for version in self.versions()[:-self.keep]:
+            for extension in ("json", "npz"):
+                try:
+                    os.remove(os.path.join(self.versions_directory, f"{version}.{extension}"))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,32 @@
+# gunicorn -c gunicorn.conf.py spacy_serviceV7:app
+# Lancement de production : l'application (modèle spaCy, vecteurs, classificateur)
+# est chargée une seule fois dans le processus maître avant le fork des workers,
+# qui partagent ensuite ces pages mémoire en copie à l'écriture.
+import gc
+import os
+
+bind = os.environ.get("SPACY_BIND", "127.0.0.1:5000")
+workers = int(os.environ.get("SPACY_WORKERS", "2"))
+threads = int(os.environ.get("SPACY_THREADS", "4"))
+timeout = int(os.environ.get("SPACY_TIMEOUT", "120"))
+graceful_timeout = int(os.environ.get("SPACY_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("SPACY_KEEPALIVE", "5"))
+worker_class = "gthread" if threads > 1 else "sync"
+preload_app = True
+
+
+def when_ready(server):
+    # Terminer le chargement des modèles dans le maître avant de créer les workers
+    import spacy_serviceV7
+    spacy_serviceV7.wait_until_ready()
+    # Geler les objets existants : le ramasse-miettes ne les touchera plus,
+    # ce qui évite de dupliquer leurs pages dans chaque worker
+    gc.freeze()
+    server.log.info("Modèles chargés, démarrage des workers")
+
+
+def post_fork(server, worker):
+    # Le maître ne fait que charger les modèles et superviser : les threads
+    # d'arrière-plan (écritures de fichiers, rechargement du modèle) tournent dans les workers
+    import spacy_serviceV7
+    spacy_serviceV7.after_fork()
@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+
+def normalize_keyword(keyword):
+    """
+    Mot-clé d'intention sous forme de tuple de mots en minuscules
+    ("machine_learning" et "machine learning" donnent ("machine", "learning")).
+    """
+    return tuple(keyword.replace("_", " ").lower().split())
+
+
+class IntentMatcher:
+    """
+    Index inversé terme -> intentions construit à partir de la section "intents"
+    (format {"intent": {"direct": [...]}} ou {"intent": [...]}).
+
+    Les expressions de plusieurs mots sont indexées par leur premier mot puis
+    vérifiées sur les tokens suivants. Un seul parcours du message donne toutes
+    les intentions reconnues avec leur score.
+    """
+
+    def __init__(self, intents):
+        self.order = {}
+        # premier mot -> liste de (expression complète, intention)
+        self.index = defaultdict(list)
+        for position, (intent, words) in enumerate(intents.items()):
+            if isinstance(words, dict):
+                words = words.get("direct", [])
+            elif not isinstance(words, list):
+                continue
+            self.order[intent] = position
+            for keyword in words:
+                phrase = normalize_keyword(str(keyword))
+                if phrase and (phrase, intent) not in self.index[phrase[0]]:
+                    self.index[phrase[0]].append((phrase, intent))
+
+    def match(self, term_sequence):
+        """
+        term_sequence : pour chaque token du message, l'ensemble de ses formes
+        (lemme, texte en minuscules). Renvoie [(intention, score)] par score
+        décroissant ; à égalité, l'ordre de déclaration des intentions est conservé.
+        Le score compte les mots-clés distincts reconnus, pondérés par leur nombre de mots.
+        """
+        matched = defaultdict(set)
+        for start, terms in enumerate(term_sequence):
+            for term in terms:
+                for phrase, intent in self.index.get(term, ()):
+                    if phrase in matched[intent]:
+                        continue
+                    end = start + len(phrase)
+                    if end > len(term_sequence):
+                        continue
+                    if all(word in term_sequence[start + offset] for offset, word in enumerate(phrase)):
+                        matched[intent].add(phrase)
+
+        scores = [
+            (intent, sum(len(phrase) for phrase in phrases))
+            for intent, phrases in matched.items() if phrases
+        ]
+        return sorted(scores, key=lambda item: (-item[1], self.order[item[0]]))
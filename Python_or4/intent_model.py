@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import numpy as np
+from collections import Counter
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+# Version du format de l'artefact sur disque, ou de son entraînement
+# (2 : classificateur entraîné sur tout le corpus, plus sur 80 %)
+ARTIFACT_VERSION = 2
+
+
+def training_data_hash(intents_and_questions):
+    """
+    Empreinte SHA-256 du contenu d'entraînement (textes et intentions) et de la
+    version de l'artefact : une nouvelle version ne réutilise pas les anciens dossiers.
+    """
+    pairs = [[entry["text"], entry["intent"]] for entry in intents_and_questions]
+    payload = json.dumps([ARTIFACT_VERSION, pairs], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IntentModel:
+    """
+    Classificateur d'intention Naive Bayes multinomial figé : vocabulaire,
+    log-probabilités a priori des classes et log-probabilités des mots.
+    La prédiction reproduit MultinomialNB.predict sans dépendre de l'objet
+    scikit-learn, ce qui permet de projeter les tableaux en mémoire (mmap).
+    """
+
+    def __init__(self, vocabulary, classes, class_log_prior, feature_log_prob, data_hash=None):
+        self.vocabulary = list(vocabulary)
+        self.classes = np.asarray(classes, dtype=object)
+        self.class_log_prior = class_log_prior
+        self.feature_log_prob = feature_log_prob
+        self.data_hash = data_hash
+        self.vectorizer = CountVectorizer(vocabulary=self.vocabulary)
+
+    @classmethod
+    def from_classifier(cls, classifier, vectorizer, data_hash=None):
+        return cls(
+            vectorizer.get_feature_names_out().tolist(),
+            classifier.classes_.tolist(),
+            classifier.class_log_prior_,
+            classifier.feature_log_prob_,
+            data_hash
+        )
+
+    def predict(self, texts):
+        if not texts:
+            return []
+        X = self.vectorizer.transform(texts)
+        joint_log_likelihood = X @ self.feature_log_prob.T + self.class_log_prior
+        return self.classes[np.argmax(joint_log_likelihood, axis=1)].tolist()
+
+    def save(self, directory):
+        """
+        Écrit l'artefact dans directory/<empreinte>. Le dossier est préparé à côté
+        puis renommé : un lecteur ne voit jamais un artefact incomplet.
+        """
+        os.makedirs(directory, exist_ok=True)
+        target = os.path.join(directory, self.data_hash)
+        if os.path.isdir(target):
+            return target
+
+        staging = tempfile.mkdtemp(prefix=".tmp-", dir=directory)
+        try:
+            np.save(os.path.join(staging, "class_log_prior.npy"), np.asarray(self.class_log_prior, dtype="float64"))
+            np.save(os.path.join(staging, "feature_log_prob.npy"), np.asarray(self.feature_log_prob, dtype="float64"))
+            meta = {
+                "version": ARTIFACT_VERSION,
+                "data_hash": self.data_hash,
+                "classes": self.classes.tolist(),
+                "vocabulary": self.vocabulary
+            }
+            with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.rename(staging, target)
+        except OSError:
+            # Un autre processus a publié le même artefact entre-temps
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.isdir(target):
+                raise
+        return target
+
+    @classmethod
+    def load(cls, directory, data_hash):
+        """
+        Charge l'artefact correspondant à l'empreinte, None s'il est absent ou
+        d'une autre version. Les tableaux sont projetés en lecture seule.
+        """
+        path = os.path.join(directory, data_hash)
+        try:
+            with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if meta.get("version") != ARTIFACT_VERSION or meta.get("data_hash") != data_hash:
+            return None
+        return cls(
+            meta["vocabulary"],
+            meta["classes"],
+            np.load(os.path.join(path, "class_log_prior.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "feature_log_prob.npy"), mmap_mode="r"),
+            data_hash
+        )
+
+
+class OnlineIntentModel:
+    """
+    Classificateur d'intention à apprentissage incrémental : HashingVectorizer
+    (sans vocabulaire à ajuster) et MultinomialNB.partial_fit.
+
+    sync() compare les paires (texte, intention) du corpus à celles déjà apprises
+    et n'applique que la différence : les nouvelles paires sont apprises, les
+    paires disparues (correction d'intention) sont retirées avec un poids négatif,
+    ce qui soustrait exactement leurs comptes. Seule une intention encore jamais
+    vue impose un réapprentissage complet, MultinomialNB fixant ses classes au
+    premier appel.
+    """
+
+    data_hash = None
+
+    def __init__(self, n_features=2 ** 18, alpha=1.0):
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+        self.alpha = alpha
+        self.classifier = None
+        self.classes = []
+        self.pairs = Counter()
+        self.generation = None
+        self._lock = threading.Lock()
+
+    def predict(self, texts):
+        if not texts:
+            return []
+        classifier = self.classifier
+        if classifier is None:
+            return ["unknown"] * len(texts)
+        return classifier.predict(self.vectorizer.transform(texts)).tolist()
+
+    def sync(self, intents_and_questions, known_intents=(), generation=None):
+        """
+        Aligne le modèle sur le corpus et renvoie le nombre de paires apprises ou retirées.
+        """
+        with self._lock:
+            pairs = Counter((entry["text"], entry["intent"]) for entry in intents_and_questions)
+            added = pairs - self.pairs
+            removed = self.pairs - pairs
+
+            labels = set(known_intents) | {intent for _, intent in pairs}
+            if self.classifier is None or not labels.issubset(self.classes):
+                self._refit(pairs, sorted(labels | set(self.classes)))
+                changes = sum(pairs.values())
+            else:
+                changes = self._update(added, 1) + self._update(removed, -1)
+
+            self.pairs = pairs
+            self.generation = generation
+            return changes
+
+    def _update(self, pairs, sign):
+        if not pairs:
+            return 0
+        texts = [text for text, _ in pairs]
+        labels = [intent for _, intent in pairs]
+        weights = [sign * count for count in pairs.values()]
+        self.classifier.partial_fit(self.vectorizer.transform(texts), labels, sample_weight=weights)
+        return len(texts)
+
+    def _refit(self, pairs, classes):
+        classifier = MultinomialNB(alpha=self.alpha)
+        if pairs:
+            texts = [text for text, _ in pairs]
+            labels = [intent for _, intent in pairs]
+            weights = list(pairs.values())
+            classifier.partial_fit(self.vectorizer.transform(texts), labels, classes=classes, sample_weight=weights)
+        self.classifier = classifier if pairs else None
+        self.classes = list(classes)
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+
+
+def prune_artifacts(directory, keep):
+    """
+    Supprime les artefacts les plus anciens en conservant les `keep` plus récents.
+    """
+    try:
+        entries = [
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if not name.startswith(".")
+        ]
+    except FileNotFoundError:
+        return
+    entries = [path for path in entries if os.path.isdir(path)]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,70 @@
+import hashlib
+import json
+from collections import namedtuple
+
+from flask import Response
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # encodeur rapide facultatif : repli sur le module json
+    orjson = None
+
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+
+# Corps JSON déjà encodé et son empreinte (ETag)
+EncodedPayload = namedtuple("EncodedPayload", ["body", "etag"])
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(data, sort_keys=False):
+    """
+    Encode en JSON UTF-8 (octets), caractères non ASCII conservés comme avec ensure_ascii=False.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0))
+    return json.dumps(data, ensure_ascii=False, sort_keys=sort_keys, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(data, status=200):
+    return Response(dumps(data), status=status, content_type=JSON_CONTENT_TYPE)
+
+
+def encode_payload(data):
+    """
+    Encode une donnée statique une seule fois ; l'ETag dérive du contenu, il est
+    donc le même dans tous les workers.
+    """
+    body = dumps(data)
+    return EncodedPayload(body, hashlib.sha1(body).hexdigest())
+
+
+def payload_response(payload, request):
+    """
+    Réponse à partir d'un corps pré-encodé, avec ETag ; 304 si le client possède
+    déjà cette version (If-None-Match).
+    """
+    response = Response(payload.body, content_type=JSON_CONTENT_TYPE)
+    response.set_etag(payload.etag)
+    return response.make_conditional(request)
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Fournisseur JSON de Flask (jsonify, request.json) reposant sur dumps() :
+    clés triées comme le fournisseur par défaut.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, sort_keys=kwargs.get("sort_keys", True)).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is not None:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        data = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(data, sort_keys=True), mimetype="application/json")
@@ -0,0 +1,100 @@
+import numpy as np
+from functools import lru_cache
+from spacy.strings import get_string_id
+from vector_table import VectorTable
+
+# Seuil utilisé quand aucune similarité n'a pu être calculée
+DEFAULT_THRESHOLD = 0.2
+
+
+class KeywordVectors:
+    """
+    Accès direct aux vecteurs des mots-clés à partir de la table statique du
+    vocabulaire, sans exécuter le pipeline spaCy. Quand la table est projetée
+    en mémoire (vector_table), les vecteurs sont des vues sur les pages partagées.
+    """
+
+    def __init__(self, nlp, cache_size=10000):
+        self.vocab = nlp.vocab
+        self.tokenizer = nlp.tokenizer
+        self.width = nlp.vocab.vectors_length
+        self.table = VectorTable.attached(nlp.vocab)
+        self.normalized_vector = lru_cache(maxsize=cache_size)(self._normalized_vector)
+
+    def _lookup(self, key):
+        if self.table is not None:
+            return self.table.get(key)
+        if key in self.vocab.vectors:
+            return self.vocab.vectors[key]
+        return None
+
+    def vector(self, keyword):
+        """
+        Vecteur d'un mot-clé (moyenne des tokens pour une expression),
+        identique à nlp(keyword).vector.
+        """
+        vector = self._lookup(get_string_id(keyword))
+        if vector is not None:
+            return vector
+
+        # Expression de plusieurs mots : seul le tokenizer est nécessaire
+        vectors = []
+        for token in self.tokenizer(keyword):
+            vector = self._lookup(token.orth)
+            vectors.append(vector if vector is not None else np.zeros((self.width,), dtype="float32"))
+        if not vectors:
+            return np.zeros((self.width,), dtype="float32")
+        return np.mean(vectors, axis=0)
+
+    def _normalized_vector(self, keyword):
+        vector = np.asarray(self.vector(keyword), dtype="float32")
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return vector
+        return vector / norm
+
+    def matrix(self, keywords):
+        """
+        Matrice (n, largeur) des vecteurs normalisés ; les mots sans vecteur donnent une ligne nulle.
+        """
+        if not keywords:
+            return np.zeros((0, self.width), dtype="float32")
+        return np.stack([self.normalized_vector(keyword) for keyword in keywords])
+
+    def similarity_matrix(self, keywords):
+        matrix = self.matrix(keywords)
+        return matrix @ matrix.T
+
+    def median_threshold(self, keywords):
+        """
+        Seuil dynamique : médiane des similarités entre toutes les paires de mots-clés.
+        """
+        if len(keywords) < 2:
+            return DEFAULT_THRESHOLD
+        rows, cols = np.triu_indices(len(keywords), k=1)
+        return float(np.median(self.similarity_matrix(keywords)[rows, cols]))
+
+    def relationships(self, keywords, threshold=None):
+        """
+        Relations entre les paires de mots-clés dont la similarité dépasse le seuil
+        (par défaut la médiane des similarités).
+        """
+        if len(keywords) < 2:
+            return []
+
+        similarities = self.similarity_matrix(keywords)
+        rows, cols = np.triu_indices(len(keywords), k=1)
+        pair_similarities = similarities[rows, cols]
+        if threshold is None:
+            threshold = float(np.median(pair_similarities))
+
+        selected = np.nonzero(pair_similarities > threshold)[0]
+        weights = np.round(pair_similarities[selected], 2)
+        return [
+            {
+                "source": keywords[i],
+                "target": keywords[j],
+                "weight": float(weight)
+            }
+            for i, j, weight in zip(rows[selected], cols[selected], weights)
+        ]
@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+from collections import namedtuple
+
+# Instantané d'un fichier : données décodées (en lecture seule), génération et signature disque
+Snapshot = namedtuple("Snapshot", ["data", "generation", "signature"])
+
+
+def file_signature(path):
+    """
+    Signature d'un fichier (inode, date de modification, taille), None s'il n'existe pas.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class KnowledgeStore:
+    """
+    Stockage en mémoire des fichiers JSON de la base de connaissances.
+
+    Chaque fichier est chargé une seule fois puis rechargé uniquement quand sa
+    signature disque change. Les nouveaux instantanés remplacent les anciens
+    d'un seul coup : un lecteur voit toujours un état complet et cohérent.
+    Les données renvoyées sont partagées entre les requêtes et ne doivent pas
+    être modifiées.
+    """
+
+    def __init__(self, interval=2.0):
+        self.interval = interval
+        self.generation = 0
+        self._files = {}
+        self._snapshots = {}
+        self._derived = {}
+        self._rejected = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def register(self, name, path, default):
+        """
+        Déclare un fichier à surveiller et le charge immédiatement.
+        """
+        self._files[name] = (path, default)
+        self._load(name, initial=True)
+
+    def get(self, name):
+        return self._snapshots[name].data
+
+    def snapshot(self, name):
+        return self._snapshots[name]
+
+    def signatures(self, names):
+        """
+        Signatures disque des fichiers demandés : identiques dans tous les processus
+        qui voient les mêmes fichiers, contrairement au compteur de générations.
+        """
+        return tuple((name, self._snapshots[name].signature) for name in names)
+
+    def derive(self, name, builder):
+        """
+        Valeur calculée à partir des données d'un fichier, recalculée seulement
+        quand le fichier change de génération.
+        """
+        snapshot = self._snapshots[name]
+        key = (name, builder)
+        cached = self._derived.get(key)
+        if cached is not None and cached[0] == snapshot.generation:
+            return cached[1]
+        value = builder(snapshot.data)
+        self._derived[key] = (snapshot.generation, value)
+        return value
+
+    def refresh(self):
+        """
+        Recharge les fichiers modifiés depuis le dernier passage, renvoie leurs noms.
+        """
+        changed = []
+        for name, (path, _) in list(self._files.items()):
+            signature = file_signature(path)
+            if signature == self._snapshots[name].signature or signature == self._rejected.get(name, False):
+                continue
+            if self._load(name):
+                changed.append(name)
+        return changed
+
+    def _load(self, name, initial=False):
+        path, default = self._files[name]
+        signature = file_signature(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = default
+        except json.JSONDecodeError as e:
+            if initial:
+                raise ValueError(f"Erreur de syntaxe dans {path}: {e}")
+            # Fichier en cours d'écriture ou invalide : conserver l'instantané précédent
+            self._rejected[name] = signature
+            print(f"Rechargement ignoré pour {path}: {e}")
+            return False
+
+        with self._lock:
+            self.generation += 1
+            self._snapshots[name] = Snapshot(data, self.generation, signature)
+        return True
+
+    def start_watching(self):
+        """
+        Lance la surveillance des fichiers dans un thread d'arrière-plan.
+        """
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="knowledge-store", daemon=True)
+        self._watcher.start()
+
+    def after_fork(self):
+        """
+        À appeler dans chaque processus enfant après un fork : les threads ne
+        sont pas copiés et un verrou pris au moment du fork resterait bloqué.
+        """
+        self._lock = threading.Lock()
+        if self._watcher is not None:
+            self._watcher = None
+            self.start_watching()
+
+    def _watch(self):
+        stop = threading.Event()
+        while not stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Erreur lors du rechargement de la base de connaissances: {e}")
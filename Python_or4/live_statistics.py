@@ -0,0 +1,281 @@
+import atexit
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from question_journal import file_lock, write_json_atomic
+
+REQUESTS = "requests"
+INTENT = "intent"
+KEYWORD = "keyword"
+# Analyses sans intention reconnue : comptées à part, hors de "intents" (le tableau de bord les afficherait comme une intention)
+UNKNOWN = "unknown"
+
+
+class CountMinSketch:
+    """
+    Estimation bornée en mémoire du nombre d'occurrences de chaque mot-clé :
+    `depth` lignes de `width` compteurs, l'estimation est le minimum des
+    compteurs de la clé (jamais inférieure au vrai compte). Les fonctions de
+    hachage sont stables, les tables de plusieurs processus s'additionnent.
+    """
+
+    def __init__(self, width=16384, depth=4, table=None):
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else np.zeros((depth, width), dtype="int64")
+        self._rows = np.arange(depth)
+
+    def _columns(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype="<u4") % self.width
+
+    def add(self, key, count=1):
+        self.table[self._rows, self._columns(key)] += count
+
+    def estimate(self, key):
+        return int(self.table[self._rows, self._columns(key)].min())
+
+
+def load_sketch(path, width, depth):
+    """
+    Sketch, mots suivis ({mot: estimation}) et comptes complets des mots-clés
+    de chaque fenêtre ({début: Counter}) enregistrés, None si le fichier est
+    absent ou de dimensions différentes.
+    """
+    try:
+        with np.load(path) as state:
+            table, words, counts = state["table"], state["words"], state["counts"]
+            window_starts, window_words, window_counts = state["window_starts"], state["window_words"], state["window_counts"]
+    except (FileNotFoundError, KeyError, ValueError):
+        return None
+    if table.shape != (depth, width):
+        return None
+    windows = {}
+    for start, word, count in zip(window_starts.tolist(), window_words.tolist(), window_counts.tolist()):
+        windows.setdefault(start, Counter())[word] = count
+    return CountMinSketch(width, depth, table), dict(zip(words.tolist(), counts.tolist())), windows
+
+
+def save_sketch(path, sketch, candidates, windows):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".npz", dir=directory)
+    entries = [(start, word, count) for start, counts in windows.items() for word, count in counts.items()]
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                table=sketch.table,
+                words=np.array(list(candidates), dtype=str),
+                counts=np.array(list(candidates.values()), dtype="int64"),
+                window_starts=np.array([entry[0] for entry in entries], dtype="int64"),
+                window_words=np.array([entry[1] for entry in entries], dtype=str),
+                window_counts=np.array([entry[2] for entry in entries], dtype="int64")
+            )
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def top_items(counts, k):
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:k])
+
+
+class LiveStatistics:
+    """
+    Statistiques d'usage (intentions, mots-clés) alimentées par les analyses.
+
+    record() ne fait qu'incrémenter un compteur du fragment attribué au thread
+    appelant à son premier appel (à tour de rôle) : un verrou par fragment,
+    disputé seulement au-delà de `shards` threads ou pendant une fusion. Un thread fusionne périodiquement ces compteurs dans le fichier
+    partagé par tous les processus, sous verrou de fichier :
+    - comptes exacts par intention (ensemble borné), les analyses sans
+      intention reconnue dans un total `unknown` à part ;
+    - Count-Min Sketch des mots-clés et `candidates` mots les plus fréquents
+      estimés (sketch_path), dont les `top_k` premiers sont publiés ;
+    - fenêtres de `bucket_seconds` secondes (les `window_buckets` dernières),
+      avec leurs intentions et leurs mots-clés (comptes complets dans
+      sketch_path, seuls les plus fréquents sont publiés).
+    Le fichier publié est la vue servie par /statistics, déjà triée et tronquée.
+    """
+
+    def __init__(self, path, sketch_path, top_k=20, candidates=1000, width=16384, depth=4,
+                 bucket_seconds=60, window_buckets=60, shards=8, flush_interval=10.0):
+        self.path = path
+        self.sketch_path = sketch_path
+        self.top_k = top_k
+        self.candidates = candidates
+        self.width = width
+        self.depth = depth
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = window_buckets
+        self.n_shards = shards
+        self.flush_interval = flush_interval
+        self._started = False
+        self._reset()
+
+    def _reset(self):
+        self._locks = [threading.Lock() for _ in range(self.n_shards)]
+        self._counts = [Counter() for _ in range(self.n_shards)]
+        self._flush_lock = threading.Lock()
+        self._next_shard = itertools.count()
+        self._thread_shard = threading.local()
+
+    def _shard(self):
+        shard = getattr(self._thread_shard, "index", None)
+        if shard is None:
+            shard = self._thread_shard.index = next(self._next_shard) % self.n_shards
+        return shard
+
+    def record(self, intent, keywords):
+        bucket = int(time.time()) // self.bucket_seconds * self.bucket_seconds
+        shard = self._shard()
+        with self._locks[shard]:
+            counts = self._counts[shard]
+            counts[(REQUESTS, bucket, "")] += 1
+            if intent and intent != UNKNOWN:
+                counts[(INTENT, bucket, intent)] += 1
+            else:
+                counts[(UNKNOWN, bucket, "")] += 1
+            for keyword in keywords:
+                counts[(KEYWORD, bucket, keyword)] += 1
+
+    def _drain(self):
+        delta = Counter()
+        for shard, lock in enumerate(self._locks):
+            with lock:
+                counts, self._counts[shard] = self._counts[shard], Counter()
+            delta.update(counts)
+        return delta
+
+    def flush(self):
+        """
+        Fusionne les compteurs accumulés depuis le dernier passage dans le fichier
+        partagé ; renvoie le nombre d'analyses ajoutées.
+        """
+        with self._flush_lock:
+            delta = self._drain()
+            if not delta:
+                return 0
+            with file_lock(self.path):
+                statistics = self._read()
+                state = load_sketch(self.sketch_path, self.width, self.depth)
+                if state is None:
+                    # Première fusion : les comptes déjà publiés amorcent le sketch
+                    sketch, candidates, windows = CountMinSketch(self.width, self.depth), {}, {}
+                    for keyword, count in statistics.get("keywords", {}).items():
+                        sketch.add(keyword, count)
+                        candidates[keyword] = count
+                else:
+                    sketch, candidates, windows = state
+                statistics, candidates, windows = self._merge(statistics, sketch, candidates, windows, delta)
+                save_sketch(self.sketch_path, sketch, candidates, windows)
+                write_json_atomic(self.path, statistics)
+            return sum(count for (kind, _, _), count in delta.items() if kind == REQUESTS)
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _merge(self, statistics, sketch, candidates, windows, delta):
+        intents = Counter(statistics.get("intents", {}))
+        buckets = {bucket["start"]: bucket for bucket in statistics.get("windows", {}).get("buckets", [])}
+
+        requests = statistics.get("requests", 0)
+        # Fichiers publiés avant que les inconnues soient comptées à part
+        unknown = statistics.get(UNKNOWN, 0) + intents.pop(UNKNOWN, 0)
+        keyword_totals = Counter()
+        for (kind, start, name), count in delta.items():
+            bucket = buckets.setdefault(start, {"start": start, "requests": 0, "intents": {}, "unknown": 0, "keywords": {}})
+            if kind == REQUESTS:
+                requests += count
+                bucket["requests"] += count
+            elif kind == UNKNOWN:
+                unknown += count
+                bucket["unknown"] = bucket.get("unknown", 0) + count
+            elif kind == INTENT:
+                intents[name] += count
+                bucket["intents"][name] = bucket["intents"].get(name, 0) + count
+            else:
+                keyword_totals[name] += count
+                windows.setdefault(start, Counter())[name] += count
+
+        for keyword, count in keyword_totals.items():
+            sketch.add(keyword, count)
+        # Estimations à jour des mots suivis et des nouveaux venus, puis les plus fréquents seulement
+        for keyword in set(candidates) | set(keyword_totals):
+            candidates[keyword] = sketch.estimate(keyword)
+        candidates = top_items(candidates, self.candidates)
+
+        latest = sorted(buckets)[-self.window_buckets:]
+        # Fenêtres expirées oubliées ; la vue publiée ne garde que les mots les plus fréquents
+        windows = {start: windows.get(start, Counter()) for start in latest}
+        published = []
+        for start in latest:
+            bucket = buckets[start]
+            bucket["keywords"] = top_items(windows[start], self.top_k)
+            published.append(bucket)
+
+        return {
+            "intents": top_items(intents, len(intents)),
+            "keywords": top_items(candidates, self.top_k),
+            "requests": requests,
+            "unknown": unknown,
+            "updated_at": time.time(),
+            "windows": {"bucket_seconds": self.bucket_seconds, "buckets": published}
+        }, candidates, windows
+
+    def start(self):
+        """
+        Lance le thread de fusion périodique.
+        """
+        if self._started:
+            return
+        self._started = True
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, args=(self._stop,), name="live-statistics", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def stop(self):
+        """
+        Arrête le thread de fusion et fusionne les compteurs restants, par
+        exemple avant de retirer le dossier des statistiques.
+        """
+        if not self._started:
+            return
+        self._started = False
+        self._stop.set()
+        self._thread.join()
+        atexit.unregister(self.flush)
+        self.flush()
+
+    def after_fork(self):
+        """
+        Dans un processus enfant : nouveaux fragments et threads, comptes hérités
+        abandonnés (le processus parent les fusionne lui-même).
+        """
+        started = self._started
+        self._started = False
+        self._reset()
+        if started:
+            self.start()
+
+    def _flush_loop(self, stop):
+        while not stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except (OSError, ValueError) as e:
+                print(f"Erreur d'écriture des statistiques {self.path}: {e}")
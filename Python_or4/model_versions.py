@@ -0,0 +1,160 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+
+class ModelVersions:
+    """
+    Versions du modèle de langue publiées côte à côte (bleu/vert).
+
+    Chaque version est un dossier <root>/versions/<version> écrit une fois pour
+    toutes ; le lien symbolique <root>/current désigne la version en service et
+    bascule d'un seul coup (rename). Chaque processus surveille ce lien, charge
+    la nouvelle version en arrière-plan puis la passe à on_change : les requêtes
+    en cours terminent avec l'ancien modèle. Les versions précédentes restent
+    sur disque pour un retour arrière immédiat.
+    """
+
+    def __init__(self, root, load, on_change=None, keep=3, interval=2.0):
+        self.root = root
+        self.versions_directory = os.path.join(root, "versions")
+        self.pointer = os.path.join(root, "current")
+        self.load = load
+        self.on_change = on_change
+        self.keep = keep
+        self.interval = interval
+        self.loaded = None
+        self._rejected = None
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def current(self):
+        """
+        Version désignée par le lien current, None si aucune version n'est publiée.
+        """
+        try:
+            target = os.readlink(self.pointer)
+        except (FileNotFoundError, OSError):
+            return None
+        version = os.path.basename(target)
+        return version if os.path.isdir(self.path(version)) else None
+
+    def path(self, version):
+        return os.path.join(self.versions_directory, version)
+
+    def versions(self):
+        """
+        Versions publiées, de la plus ancienne à la plus récente.
+        """
+        try:
+            names = os.listdir(self.versions_directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name for name in names if not name.startswith(".") and os.path.isdir(self.path(name)))
+
+    def publish(self, nlp):
+        """
+        Écrit le modèle dans une nouvelle version, y fait pointer current et renvoie la version.
+        """
+        os.makedirs(self.versions_directory, exist_ok=True)
+        version = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        staging = tempfile.mkdtemp(prefix=".tmp-", dir=self.versions_directory)
+        try:
+            nlp.to_disk(staging)
+            os.rename(staging, self.path(version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self._point(version)
+        self.prune()
+        return version
+
+    def rollback(self, version=None):
+        """
+        Fait pointer current sur `version` ou, par défaut, sur la version précédant
+        la version en service. Renvoie la version choisie, None s'il n'y en a pas.
+        """
+        versions = self.versions()
+        if version is None:
+            current = self.current()
+            older = [name for name in versions if current is None or name < current]
+            version = older[-1] if older else None
+        if version is None or version not in versions:
+            return None
+        self._point(version)
+        return version
+
+    def _point(self, version):
+        # Lien temporaire renommé sur current : le remplacement est atomique
+        temporary = os.path.join(self.root, f".current-{uuid.uuid4().hex}")
+        os.symlink(os.path.join("versions", version), temporary)
+        os.replace(temporary, self.pointer)
+
+    def prune(self):
+        """
+        Supprime les versions les plus anciennes en conservant les `keep` plus
+        récentes ainsi que la version en service.
+        """
+        current = self.current()
+        versions = self.versions()
+        for version in versions[:-self.keep] if self.keep else versions:
+            if version != current:
+                shutil.rmtree(self.path(version), ignore_errors=True)
+
+    def load_current(self, default):
+        """
+        Charge la version en service, ou `default` (nom ou chemin de modèle spaCy)
+        si aucune n'est publiée.
+        """
+        with self._lock:
+            version = self.current()
+            model = self.load(self.path(version) if version else default)
+            self.loaded = version
+            return model
+
+    def refresh(self):
+        """
+        Charge la version en service si elle a changé depuis le dernier chargement
+        et la transmet à on_change. Renvoie True si le modèle a été remplacé.
+        """
+        with self._lock:
+            version = self.current()
+            if version is None or version == self.loaded or version == self._rejected:
+                return False
+            try:
+                model = self.load(self.path(version))
+            except Exception as e:
+                # Version illisible : conserver le modèle en service
+                self._rejected = version
+                print(f"Chargement de la version {version} du modèle impossible: {e}")
+                return False
+            self.loaded = version
+            if self.on_change:
+                self.on_change(model, version)
+            return True
+
+    def start_watching(self):
+        """
+        Lance la surveillance du lien current dans un thread d'arrière-plan.
+        """
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="model-versions", daemon=True)
+        self._watcher.start()
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+        if self._watcher is not None:
+            self._watcher = None
+            self.start_watching()
+
+    def _watch(self):
+        stop = threading.Event()
+        while not stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Erreur lors du rechargement du modèle: {e}")
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+
+# Version du format de l'index sur disque
+NEIGHBOUR_INDEX_VERSION = 1
+# Mots retenus comme voisins : lettres, éventuellement composés (porte-monnaie, aujourd'hui)
+KEYWORD_PATTERN = re.compile(r"^[^\W\d_]{2,}(?:[-'’][^\W\d_]+)*$")
+
+
+def keyword_rows(vectors, strings, stop_words=()):
+    """
+    Mot représentant chaque ligne de la table de vecteurs : {ligne: mot}.
+
+    Dans les modèles spaCy élagués, plusieurs centaines de milliers de clés
+    partagent quelques dizaines de milliers de lignes ; la première clé d'une
+    ligne est le mot dont le vecteur a été conservé, les suivantes y ont été
+    rattachées. Seuls les mots (pas la ponctuation, les nombres ou les mots
+    vides) sont retenus.
+    """
+    seen = set()
+    labels = {}
+    n_rows = vectors.data.shape[0]
+    for key, row in vectors.key2row.items():
+        if row in seen:
+            continue
+        seen.add(row)
+        word = strings[key] if key in strings else None
+        if word and KEYWORD_PATTERN.match(word) and word.lower() not in stop_words:
+            labels[row] = word
+        if len(seen) == n_rows:
+            break
+    return labels
+
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype("float32")
+
+
+def spherical_kmeans(vectors, n_lists, iterations=10, seed=0, chunk_size=4096):
+    """
+    k-moyennes sur des vecteurs normalisés (similarité cosinus). Renvoie les
+    centroïdes normalisés et la liste attribuée à chaque vecteur.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    assignments = np.zeros(len(vectors), dtype="int32")
+    for _ in range(iterations):
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=n_lists)
+        # Une liste vide repart d'un vecteur tiré au hasard
+        empty = np.nonzero(counts == 0)[0]
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids, assignments
+
+
+def build_neighbour_index(vectors, strings, directory, stop_words=(), n_lists=None, iterations=10):
+    """
+    Construit l'index IVF (listes inversées) des mots du vocabulaire dans
+    directory/<empreinte des vecteurs et des mots> s'il n'y est pas déjà, et
+    renvoie son dossier.
+
+    Les vecteurs normalisés sont rangés liste par liste : une recherche ne lit
+    que les quelques listes dont le centroïde est le plus proche de la requête.
+    """
+    labels = keyword_rows(vectors, strings, stop_words)
+    rows = np.fromiter(sorted(labels), dtype="int64", count=len(labels))
+    words = [labels[row] for row in rows]
+    if n_lists is None:
+        n_lists = max(1, int(np.sqrt(len(rows))))
+    n_lists = min(n_lists, len(rows))
+
+    data = np.ascontiguousarray(vectors.data, dtype="float32")
+    digest = hashlib.sha1(memoryview(data))
+    digest.update("\n".join(words).encode("utf-8"))
+    digest.update(f"{n_lists}:{iterations}".encode("ascii"))
+    target = os.path.join(directory, digest.hexdigest()[:16])
+    if os.path.isdir(target):
+        return target
+
+    matrix = normalize_rows(data[rows])
+    centroids, assignments = spherical_kmeans(matrix, n_lists, iterations)
+    order = np.argsort(assignments, kind="stable")
+    offsets = np.zeros(n_lists + 1, dtype="int64")
+    np.cumsum(np.bincount(assignments, minlength=n_lists), out=offsets[1:])
+
+    os.makedirs(directory, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".tmp-", dir=directory)
+    try:
+        os.chmod(staging, 0o755)
+        np.save(os.path.join(staging, "centroids.npy"), centroids)
+        np.save(os.path.join(staging, "vectors.npy"), matrix[order])
+        np.save(os.path.join(staging, "offsets.npy"), offsets)
+        with open(os.path.join(staging, "words.json"), "w", encoding="utf-8") as f:
+            json.dump([words[i] for i in order], f, ensure_ascii=False)
+        meta = {"version": NEIGHBOUR_INDEX_VERSION, "size": len(words), "lists": n_lists, "width": matrix.shape[1]}
+        with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.rename(staging, target)
+    except OSError:
+        # Un autre processus a publié le même index entre-temps
+        shutil.rmtree(staging, ignore_errors=True)
+        if not os.path.isdir(target):
+            raise
+    return target
+
+
+class NeighbourIndex:
+    """
+    Index IVF des plus proches voisins, projeté en mémoire en lecture seule et
+    partagé par tous les workers.
+    """
+
+    def __init__(self, centroids, vectors, offsets, words, path):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.offsets = offsets
+        self.words = words
+        self.path = path
+
+    @classmethod
+    def load(cls, path):
+        """
+        Ouvre l'index du dossier, None s'il est absent ou d'une autre version.
+        """
+        try:
+            with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if meta.get("version") != NEIGHBOUR_INDEX_VERSION:
+            return None
+        with open(os.path.join(path, "words.json"), "r", encoding="utf-8") as f:
+            words = json.load(f)
+        return cls(
+            np.load(os.path.join(path, "centroids.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "vectors.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "offsets.npy")),
+            words,
+            path
+        )
+
+    def __len__(self):
+        return len(self.words)
+
+    def search(self, vector, k=10, n_probe=8, exclude=()):
+        """
+        Les k mots les plus proches du vecteur, [(mot, similarité)] par similarité
+        décroissante. Les mots de `exclude` (en minuscules) et les variantes de
+        casse d'un même mot ne sont renvoyés qu'une fois au plus.
+        """
+        vector = np.asarray(vector, dtype="float32")
+        norm = np.linalg.norm(vector)
+        if norm == 0 or k <= 0:
+            return []
+        query = vector / norm
+
+        n_probe = min(n_probe, len(self.centroids))
+        probes = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        # Listes contiguës lues dans l'ordre du fichier
+        candidates = np.concatenate([
+            np.arange(self.offsets[probe], self.offsets[probe + 1]) for probe in np.sort(probes)
+        ])
+        if not len(candidates):
+            return []
+        scores = self.vectors[candidates] @ query
+
+        # Marge pour les mots exclus et les doublons de casse
+        limit = min(len(candidates), 2 * k + len(exclude))
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best])]
+
+        results = []
+        seen = set(exclude)
+        for index in best:
+            word = self.words[candidates[index]]
+            folded = word.lower()
+            if folded in seen:
+                continue
+            seen.add(folded)
+            results.append((word, float(scores[index])))
+            if len(results) == k:
+                break
+        return results
+
+
+def load_neighbour_index(nlp, directory, stop_words=()):
+    """
+    Index des mots du vocabulaire du modèle, construit au premier chargement ;
+    None si le modèle n'a pas de vecteurs.
+    """
+    vectors = nlp.vocab.vectors
+    if vectors.data.size == 0 or not len(vectors.key2row):
+        return None
+    return NeighbourIndex.load(build_neighbour_index(vectors, nlp.vocab.strings, directory, stop_words))
@@ -0,0 +1,78 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PoolSaturated(Exception):
+    """
+    Levée quand la file d'attente du pool est pleine : la requête doit être refusée.
+    """
+
+
+class NlpPool:
+    """
+    Pool de taille fixe pour le travail CPU (nlp(...), prédiction d'intention,
+    similarités) avec une file d'attente bornée.
+
+    Au-delà de `workers + queue_size` tâches en cours ou en attente, submit()
+    échoue immédiatement au lieu de laisser la latence croître sans limite.
+
+    Les connexions sont acceptées par les threads des workers gunicorn (gthread,
+    voir gunicorn.conf.py) : le service reste une application Flask (WSGI),
+    sans boucle asyncio en façade.
+    """
+
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._create()
+
+    def _create(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="nlp")
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._pending = 0
+        self._rejected = 0
+        self._counter_lock = threading.Lock()
+
+    def after_fork(self):
+        """
+        Recrée l'exécuteur dans un processus enfant : ses threads n'ont pas été copiés.
+        """
+        self._create()
+
+    def submit(self, fn, *args, block=False, **kwargs):
+        """
+        Place une tâche dans le pool. Sans `block`, lève PoolSaturated si la file est pleine.
+        """
+        if not self._slots.acquire(blocking=block):
+            with self._counter_lock:
+                self._rejected += 1
+            raise PoolSaturated()
+        with self._counter_lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future):
+        with self._counter_lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def run(self, fn, *args, timeout=None, block=False, **kwargs):
+        """
+        Exécute la tâche dans le pool et attend son résultat.
+        """
+        return self.submit(fn, *args, block=block, **kwargs).result(timeout)
+
+    def stats(self):
+        with self._counter_lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "pending": self._pending,
+                "rejected": self._rejected
+            }
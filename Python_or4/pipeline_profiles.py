@@ -0,0 +1,39 @@
+from functools import lru_cache
+
+# Composants utilisés par chaque profil ; tous les autres (parser, senter,
+# textcat d'une version entraînée...) sont désactivés pour l'appel
+PIPELINE_PROFILES = {
+    # Tokenisation et stop words (attributs lexicaux) : aucun composant
+    "tokens": (),
+    # Catégories grammaticales et lemmes : mots-clés, termes de la table IDF
+    "terms": ("tok2vec", "morphologizer", "attribute_ruler", "lemmatizer"),
+    # Entités nommées : la NER du modèle a son propre tok2vec
+    "entities": ("ner",),
+    # Analyse d'un message : mots-clés et entités, sans analyse syntaxique
+    "analysis": ("tok2vec", "morphologizer", "attribute_ruler", "lemmatizer", "ner"),
+}
+
+
+@lru_cache(maxsize=64)
+def _disabled(pipe_names, profile):
+    enabled = PIPELINE_PROFILES[profile]
+    return [name for name in pipe_names if name not in enabled]
+
+
+def disabled_components(nlp, profile):
+    """
+    Composants du pipeline à désactiver pour le profil.
+    """
+    return _disabled(tuple(nlp.pipe_names), profile)
+
+
+def parse(nlp, text, profile):
+    """
+    Exécute le pipeline réduit au profil. Le paramètre disable ne modifie pas le
+    pipeline partagé, contrairement à nlp.select_pipes : l'appel reste sûr entre threads.
+    """
+    return nlp(text, disable=disabled_components(nlp, profile))
+
+
+def parse_many(nlp, texts, profile, **kwargs):
+    return nlp.pipe(texts, disable=disabled_components(nlp, profile), **kwargs)
@@ -0,0 +1,100 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Profileur par échantillonnage activable à chaud : un thread relève la pile de
+    chaque thread à intervalle régulier (sys._current_frames) et compte les piles
+    identiques. Le résultat est au format « collapsed » des flame graphs
+    (thread;fonction;...;fonction nombre).
+    """
+
+    def __init__(self):
+        self._stacks = Counter()
+        self._samples = 0
+        self._stop = None
+        self._thread = None
+        self._started_at = None
+        self._interval = None
+        self._lock = threading.Lock()
+
+    def start(self, interval=0.005, duration=None):
+        """
+        Démarre l'échantillonnage (sans effet s'il est déjà actif) ; arrêt
+        automatique après `duration` secondes si elle est fournie.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._stacks = Counter()
+            self._samples = 0
+            self._interval = interval
+            self._started_at = time.time()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(
+                target=self._sample_loop, args=(self._stop, interval, duration), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def stop(self):
+        with self._lock:
+            if self._thread is None:
+                return False
+            self._stop.set()
+            thread, self._thread = self._thread, None
+        thread.join()
+        return True
+
+    def after_fork(self):
+        # Le thread d'échantillonnage n'existe pas dans le processus enfant
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def status(self):
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "interval": self._interval,
+                "started_at": self._started_at,
+                "samples": self._samples
+            }
+
+    def collapsed(self):
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def _sample_loop(self, stop, interval, duration):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + duration if duration else None
+        while not stop.wait(interval):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)))
+                stack = ";".join(reversed(labels))
+                with self._lock:
+                    self._stacks[stack] += 1
+            with self._lock:
+                self._samples += 1
+        with self._lock:
+            # Arrêt automatique : le profileur peut être relancé
+            if self._stop is stop:
+                self._thread = None
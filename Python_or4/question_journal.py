@@ -0,0 +1,195 @@
+import atexit
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Verrou exclusif inter-processus associé à un fichier (path + ".lock").
+    """
+    with open(path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_json_atomic(path, data):
+    """
+    Écrit un fichier JSON via un fichier temporaire renommé : les lecteurs voient
+    l'ancien contenu ou le nouveau, jamais un fichier tronqué. Le fichier garde
+    ses permissions (0644 s'il est nouveau) : mkstemp crée en 0600, ce qui le
+    rendrait illisible pour les autres utilisateurs (application PHP).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o644
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class QuestionJournal:
+    """
+    Journal NDJSON en ajout seul des questions sans intention reconnue.
+
+    append() ne fait que placer l'entrée en mémoire (O(1)) ; un thread d'écriture
+    vide ce tampon par lots, en un seul write suivi d'un fsync. Un compacteur
+    fusionne périodiquement le journal dans le corpus d'entraînement JSON.
+    """
+
+    def __init__(self, path, corpus_file, flush_interval=0.5, compact_interval=60.0):
+        self.path = path
+        self.corpus_file = corpus_file
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self._started = False
+        self._reset()
+
+    def _reset(self):
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def append(self, entry):
+        with self._lock:
+            self._buffer.append(entry)
+
+    def flush(self):
+        """
+        Écrit le tampon dans le journal (un seul appel write par lot).
+        """
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return 0
+        payload = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode("utf-8")
+        # Le verrou empêche d'écrire dans un journal que le compacteur vient de renommer
+        with file_lock(self.path):
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, payload)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        return len(entries)
+
+    def compact(self):
+        """
+        Fusionne le journal dans le corpus et renvoie le nombre de questions ajoutées.
+        Les questions déjà présentes dans le corpus ne sont pas dupliquées.
+        """
+        compacting = self.path + ".compacting"
+        # Un seul compactage à la fois, tous processus confondus
+        with file_lock(compacting):
+            return self._compact(compacting)
+
+    def _compact(self, compacting):
+        with file_lock(self.path):
+            # Un compactage interrompu a pu laisser un fichier à reprendre
+            if not os.path.exists(compacting):
+                if not os.path.exists(self.path):
+                    return 0
+                os.rename(self.path, compacting)
+
+        entries = []
+        with open(compacting, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Ligne incomplète (arrêt brutal pendant l'écriture) : ignorée
+                    continue
+
+        added = 0
+        with file_lock(self.corpus_file):
+            try:
+                with open(self.corpus_file, "r", encoding="utf-8") as f:
+                    corpus = json.load(f)
+            except FileNotFoundError:
+                corpus = []
+            known = {entry.get("text") for entry in corpus}
+            for entry in entries:
+                if entry.get("text") and entry["text"] not in known:
+                    corpus.append(entry)
+                    known.add(entry["text"])
+                    added += 1
+            if added:
+                write_json_atomic(self.corpus_file, corpus)
+        os.remove(compacting)
+        return added
+
+    def start(self):
+        """
+        Lance les threads d'écriture et de compactage.
+        """
+        if self._started:
+            return
+        self._started = True
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._flush_loop, args=(self._stop,), name="question-journal", daemon=True),
+            threading.Thread(target=self._compact_loop, args=(self._stop,), name="question-journal-compactor", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+        atexit.register(self.flush)
+
+    def stop(self):
+        """
+        Arrête les threads et écrit le tampon restant, par exemple avant de
+        retirer le dossier du journal.
+        """
+        if not self._started:
+            return
+        self._started = False
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        atexit.unregister(self.flush)
+        self.flush()
+
+    def after_fork(self):
+        """
+        Dans un processus enfant : nouveaux verrous et threads, tampon hérité abandonné
+        (le processus parent l'écrit lui-même).
+        """
+        started = self._started
+        self._started = False
+        self._reset()
+        if started:
+            self.start()
+
+    def _flush_loop(self, stop):
+        while not stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Erreur d'écriture du journal {self.path}: {e}")
+
+    def _compact_loop(self, stop):
+        while not stop.wait(self.compact_interval):
+            try:
+                self.flush()
+                self.compact()
+            except (OSError, ValueError) as e:
+                print(f"Erreur lors du compactage du journal {self.path}: {e}")
@@ -12,7 +12,10 @@ from spacy.lang.fr.stop_words import STOP_WORDS
 from sklearn.model_selection import train_test_split
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.feature_extraction.text import CountVectorizer
+from keyword_vectors import KeywordVectors
 from nltk.corpus import wordnet
+from functools import lru_cache
+from synonym_table import SynonymTable, rank_synonyms, wordnet_lemma_names
 
 app = Flask(__name__)
 
@@ -27,6 +30,7 @@ CLUSTERS_FILE = "../public/base/clusters.json"
 STATISTICS_FILE = "../public/base/statistics.json"
 API_KEY = "mdpOr4"
 GLOSSARY_FILE = "../public/base/glossary.json"
+SYNONYMS_FILE = "../public/base/synonyms_fr.json"  # table produite par build_synonyms.py
 
 # Initialiser les stop words et les normaliser en centralisant la gestion
 french_stop_words = list(STOP_WORDS)
@@ -46,18 +50,27 @@ for word in normalized_stop_words:
     lexeme = nlp.vocab[word]
     lexeme.is_stop = True
 
+# Vecteurs des mots-clés lus directement dans la table du vocabulaire
+keyword_vectors = KeywordVectors(nlp)
+
 # Initialiser les lookup tables pour lemmatisation
 lookups = Lookups()
 lookups.add_table("lemma_lookup")
 nlp.vocab.lookups = lookups
 
 
+# Table des synonymes précalculée : limitée et classée par similarité pour chaque mot
+synonym_table = SynonymTable.load(SYNONYMS_FILE)
+
 def get_synonyms(word):
-    synonyms = set()
-    for syn in wordnet.synsets(word, lang='fra'):
-        for lemma in syn.lemmas(lang='fra'):
-            synonyms.add(lemma.name())
-    return list(synonyms)
+    if synonym_table is not None:
+        return synonym_table.get(word)
+    return list(wordnet_synonyms(word))
+
+# Sans table : parcours de WordNet une seule fois par mot, avec la même limite et le même classement
+@lru_cache(maxsize=10000)
+def wordnet_synonyms(word):
+    return tuple(rank_synonyms(word, wordnet_lemma_names(wordnet, word), keyword_vectors))
 
 # Charger le classificateur et le vectoriseur pour l'intention
 def load_intents_and_questions():
@@ -267,41 +280,17 @@ def calculate_relationships():
     if len(keywords) < 2:
         return jsonify({"relationships": []})
 
-    relationships = []
-    similarities = []
-
-     # Calcul des similarités pour déterminer la médiane
-    for i in range(len(keywords)):
-        for j in range(i + 1, len(keywords)):
-            vec1 = nlp(keywords[i]).vector
-            vec2 = nlp(keywords[j]).vector
-            similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-            similarities.append(similarity)
+    # Seuil dynamique basé sur la médiane des similarités des mots-clés d'origine
+    dynamic_threshold = keyword_vectors.median_threshold(keywords)
 
     # Ajout de synonymes pour enrichir les mots-clés
     enriched_keywords = set(keywords)
     for keyword in keywords:
         enriched_keywords.update(get_synonyms(keyword))
-    enriched_keywords = list(enriched_keywords)        
-
-    # Calculer un seuil dynamique basé sur la médiane
-    if similarities:
-        dynamic_threshold = np.median(similarities)
-    else:
-        dynamic_threshold = 0.2  # valeur par défaut si aucune similarité calculée
+    enriched_keywords = list(enriched_keywords)
 
     # Création des relations si la similarité dépasse le seuil dynamique
-    for i in range(len(enriched_keywords)):
-        for j in range(i + 1, len(enriched_keywords)):
-            vec1 = nlp(enriched_keywords[i]).vector
-            vec2 = nlp(enriched_keywords[j]).vector
-            similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-            if similarity > dynamic_threshold:
-                relationships.append({
-                    "source": enriched_keywords[i],
-                    "target": enriched_keywords[j],
-                    "weight": float(round(similarity, 2))
-                })
+    relationships = keyword_vectors.relationships(enriched_keywords, dynamic_threshold)
 
     #return jsonify({"relationships": relationships})
     response_data={"relationships": relationships}
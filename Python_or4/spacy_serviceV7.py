@@ -1,31 +1,146 @@
 import spacy
-import numpy as np
-import random
 import json
 import os
+import copy
+import threading
+import time
+from itertools import islice
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import unidecode
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from spacy.lookups import Lookups
-from sklearn.feature_extraction.text import TfidfVectorizer
-from spacy.training.example import Example
 from spacy.lang.fr.stop_words import STOP_WORDS
 from sklearn.model_selection import train_test_split
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.feature_extraction.text import CountVectorizer
+from keyword_vectors import KeywordVectors
+from vector_table import attach_vector_table
+from neighbour_index import load_neighbour_index
+from cluster_engine import ClusterEngine, question_vector
+from live_statistics import LiveStatistics
+from knowledge_store import KnowledgeStore
+from tfidf_index import TfidfIndex
+from analysis_context import AnalysisContext
+from pipeline_profiles import parse, parse_many
+from analysis_cache import AnalysisCache, LocalBackend, RedisBackend, analysis_generation
+from metrics import Registry
+from json_responses import FastJSONProvider, dumps, json_response, encode_payload, payload_response
+from structured_log import StructuredLogger
+from profiler import SamplingProfiler
+from nlp_pool import NlpPool, PoolSaturated
+from question_journal import QuestionJournal, file_lock, write_json_atomic
+from intent_matcher import IntentMatcher
+from train_jobs import JobPending, TrainJobs
+from model_versions import ModelVersions
+from intent_model import IntentModel, OnlineIntentModel, training_data_hash, prune_artifacts
 
 app = Flask(__name__)
-
-# Charger le modèle de langue français
-nlp = spacy.load("fr_core_news_md")
-#nlp.vocab["l"].is_stop = True
+# Encodage JSON rapide (orjson) pour jsonify et request.json
+app.json = FastJSONProvider(app)
+
+# Modèle de langue, vecteurs et classificateur : chargés en arrière-plan par warm_up()
+# pour que le serveur écoute immédiatement
+nlp = None
+keyword_vectors = None
+neighbour_index = None
+intent_model = None
+models_loaded = threading.Event()
+warm_up_done = threading.Event()
+warm_up_error = None
 
 # Charger les intentions et questions
 INTENTS_AND_QUESTIONS_FILE = "../public/base/intents_and_questions.json"
 INTENTS_AND_RESPONSES_FILE = "../public/base/intents_and_responses.json"
 CLUSTERS_FILE = "../public/base/clusters.json"
 STATISTICS_FILE = "../public/base/statistics.json"
+STATISTICS_SKETCH_FILE = "statistics_sketch.npz"  # Count-Min Sketch et mots-clés suivis par les statistiques
+STATISTICS_TOP_K = 20  # mots-clés publiés dans statistics.json (total et par fenêtre)
 API_KEY = "mdpOr4"
 GLOSSARY_FILE = "../public/base/glossary.json"
+UNKNOWN_QUESTIONS_JOURNAL = "../public/base/unknown_questions.ndjson"
+JOURNAL_FLUSH_INTERVAL = 0.5  # secondes entre deux écritures groupées du journal
+JOURNAL_COMPACT_INTERVAL = 60.0  # secondes entre deux fusions du journal dans le corpus
+KNOWLEDGE_RELOAD_INTERVAL = 2.0  # secondes entre deux vérifications des fichiers
+ANALYZE_BATCH_SIZE = 64  # taille des lots passés à nlp.pipe par /analyze_batch
+ANALYZE_N_PROCESS = 1  # nombre de processus utilisés par nlp.pipe
+INTENT_MODEL_DIRECTORY = "intent_models"  # artefacts du classificateur, un dossier par empreinte du corpus
+INTENT_MODEL_KEEP = 3  # nombre d'artefacts conservés sur disque
+BASE_MODEL = "fr_core_news_md"
+TRAIN_JOBS_DIRECTORY = "train_jobs"  # un dossier par entraînement : état, exemples, point de reprise
+MODEL_VERSIONS_DIRECTORY = "models"  # versions/<version> et lien current vers la version en service
+VECTOR_TABLE_DIRECTORY = "vector_tables"  # tables de vecteurs projetées en mémoire, une par empreinte du contenu
+NEIGHBOUR_INDEX_DIRECTORY = "neighbour_indexes"  # index des mots voisins de /related_keywords, un par empreinte
+RELATED_KEYWORDS_LIMIT = 10  # nombre de mots renvoyés par défaut par /related_keywords
+RELATED_KEYWORDS_MAX = 100
+# Listes de l'index parcourues par recherche : plus de listes, meilleur rappel mais recherche plus lente
+RELATED_KEYWORDS_PROBES = int(os.environ.get("SPACY_RELATED_PROBES", "8"))
+CLUSTER_SNAPSHOTS_DIRECTORY = "cluster_snapshots"  # versions/<n>.json des regroupements et current.json
+CLUSTER_SNAPSHOTS_KEEP = 10  # instantanés conservés sur disque
+CLUSTERS_PER_PAGE = 20  # groupes renvoyés par page de /explore_clusters
+CLUSTERS_PER_PAGE_MAX = 100
+# Regroupement des questions du corpus, recalculé quand il change (intervalle de vérification en secondes)
+CLUSTERING_ENABLED = os.environ.get("SPACY_CLUSTERING", "1") == "1"
+CLUSTERING_INTERVAL = float(os.environ.get("SPACY_CLUSTERING_INTERVAL", "30"))
+# Secondes entre deux fusions des statistiques d'usage dans statistics.json
+STATISTICS_FLUSH_INTERVAL = float(os.environ.get("SPACY_STATISTICS_FLUSH", "10"))
+MODEL_VERSIONS_KEEP = 3  # versions conservées pour un retour arrière
+MODEL_RELOAD_INTERVAL = 2.0  # secondes entre deux vérifications du lien current
+TRAINING_LOSSES_FILE = "training_losses.json"
+TRAIN_EPOCHS = int(os.environ.get("SPACY_TRAIN_EPOCHS", "20"))
+# Mode apprentissage en ligne : le classificateur suit les corrections sans réentraînement complet
+INTENT_ONLINE_LEARNING = os.environ.get("SPACY_INTENT_ONLINE", "0") == "1"
+# Pool borné pour le travail CPU : nombre de threads, places en file d'attente, délai maximal (secondes)
+NLP_POOL_WORKERS = int(os.environ.get("SPACY_NLP_WORKERS", "2"))
+NLP_POOL_QUEUE = int(os.environ.get("SPACY_NLP_QUEUE", "16"))
+NLP_POOL_TIMEOUT = float(os.environ.get("SPACY_NLP_TIMEOUT", "30"))
+# Cache des résultats de /analyze_context : nombre d'entrées, durée de vie (secondes)
+# et stockage partagé facultatif ("redis://..." ou "local" pour le remplaçant en mémoire)
+ANALYSIS_CACHE_SIZE = int(os.environ.get("SPACY_CACHE_SIZE", "10000"))
+ANALYSIS_CACHE_TTL = float(os.environ.get("SPACY_CACHE_TTL", "3600"))
+ANALYSIS_CACHE_BACKEND = os.environ.get("SPACY_CACHE_BACKEND", "")
+# Part des analyses journalisées (une ligne JSON par requête retenue)
+LOG_SAMPLE_RATE = float(os.environ.get("SPACY_LOG_SAMPLE_RATE", "0.1"))
+# Routes du profileur par échantillonnage (/profiler/...) : désactivées sauf demande explicite
+PROFILER_ENABLED = os.environ.get("SPACY_PROFILER", "0") == "1"
+
+# Requêtes synthétiques jouées pendant le démarrage pour amorcer les caches
+WARM_UP_MESSAGES = [
+    "Qu'est-ce que l'intelligence artificielle ?",
+    "Quels ateliers sont disponibles aux Potins Numériques ?",
+]
+WARM_UP_KEYWORDS = ["intelligence", "apprentissage", "données", "atelier"]
+# Routes qui ne dépendent pas du modèle et restent servies pendant le démarrage
+ENDPOINTS_WITHOUT_MODEL = {"healthz", "readyz", "train_status", "model_status", "cache_stats", "metrics_endpoint",
+                           "profiler_report", "profiler_start", "profiler_stop", "explore_clusters", "get_statistics", "get_glossary_term", "update_intent"}
+
+# Pool borné partagé par les routes d'analyse
+nlp_pool = NlpPool(NLP_POOL_WORKERS, NLP_POOL_QUEUE)
+
+def create_cache_backend(setting):
+    if not setting:
+        return None
+    if setting == "local":
+        return LocalBackend()
+    return RedisBackend(setting)
+
+# Métriques du processus, exposées par /metrics
+metrics = Registry()
+REQUEST_SECONDS = metrics.histogram("spacy_request_duration_seconds", "Durée de traitement des requêtes HTTP.", ["endpoint", "method"])
+REQUESTS_TOTAL = metrics.counter("spacy_requests_total", "Requêtes HTTP traitées.", ["endpoint", "method", "status"])
+STAGE_SECONDS = metrics.histogram("spacy_stage_duration_seconds", "Durée de chaque étape de l'analyse.", ["stage"])
+DOC_TOKENS = metrics.histogram("spacy_doc_tokens", "Nombre de tokens des messages analysés.", buckets=(2, 4, 8, 16, 32, 64, 128, 256, 512))
+KEYWORD_COUNT = metrics.histogram("spacy_keywords", "Nombre de mots-clés retenus par analyse.", buckets=(0, 1, 2, 3, 5, 8, 13, 21))
+profiler = SamplingProfiler()
+
+# Journal structuré des requêtes, écrit par un thread dédié
+request_log = StructuredLogger("spacy_service", sample_rate=LOG_SAMPLE_RATE)
+
+# Résultats d'analyse des messages déjà vus
+analysis_cache = AnalysisCache(
+    max_size=ANALYSIS_CACHE_SIZE,
+    ttl=ANALYSIS_CACHE_TTL,
+    backend=create_cache_backend(ANALYSIS_CACHE_BACKEND)
+)
 
 # Initialiser les stop words et les normaliser en centralisant la gestion
 french_stop_words = list(STOP_WORDS)
@@ -39,58 +154,142 @@ stop_words_to_remove = ["public", "artificielle", "potins", "numérique"]
 for word in stop_words_to_remove:
     if word in normalized_stop_words:
         normalized_stop_words.remove(word)
+# Mots jamais proposés par /related_keywords
+related_stop_words = set(french_stop_words).union(normalized_stop_words).difference(stop_words_to_remove)
+
+
+def load_nlp():
+    # Charger la version publiée du modèle de langue, à défaut le modèle français de base
+    return model_versions.load_current(BASE_MODEL)
+
+def configure_nlp(loaded_nlp):
+    # Ajouter les stop words à vocab pour que spaCy reconnaisse également ces mots comme des stop words
+    for word in normalized_stop_words:
+        lexeme = loaded_nlp.vocab[word]
+        lexeme.is_stop = True
+
+    # Initialiser les lookup tables pour lemmatisation
+    lookups = Lookups()
+    lookups.add_table("lemma_lookup")
+    loaded_nlp.vocab.lookups = lookups
 
-# Ajouter les stop words à vocab pour que spaCy reconnaisse également ces mots comme des stop words
-for word in normalized_stop_words:
-    lexeme = nlp.vocab[word]
-    lexeme.is_stop = True
+    # Vecteurs statiques lus dans un fichier projeté en mémoire, partagé par tous les workers
+    attach_vector_table(loaded_nlp, VECTOR_TABLE_DIRECTORY)
+    return loaded_nlp
 
-# Initialiser les lookup tables pour lemmatisation
-lookups = Lookups()
-lookups.add_table("lemma_lookup")
-nlp.vocab.lookups = lookups
 
+# Base de connaissances chargée une seule fois et rechargée à chaud quand les fichiers changent
+knowledge_store = KnowledgeStore(interval=KNOWLEDGE_RELOAD_INTERVAL)
+knowledge_store.register("intents_and_questions", INTENTS_AND_QUESTIONS_FILE, [])
+knowledge_store.register("intents_and_responses", INTENTS_AND_RESPONSES_FILE, {"intents": {}, "responses": {}})
+knowledge_store.register("glossary", GLOSSARY_FILE, {"terms": {}})
+knowledge_store.register("clusters", CLUSTERS_FILE, {})
+knowledge_store.register("cluster_snapshot", os.path.join(CLUSTER_SNAPSHOTS_DIRECTORY, "current.json"), {})
+knowledge_store.register("statistics", STATISTICS_FILE, {})
+knowledge_store.start_watching()
 
 # Charger le classificateur et le vectoriseur pour l'intention
+# Les données renvoyées sont partagées : les copier avant toute modification
 def load_intents_and_questions():
-    try:
-        with open(INTENTS_AND_QUESTIONS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []  # Retourne une liste vide si le fichier n'existe pas
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Erreur de syntaxe dans {INTENTS_AND_QUESTIONS_FILE}: {e}")
+    return knowledge_store.get("intents_and_questions")
 
 # Charger les intentions et réponses
 def load_intents_and_responses():
-    try:
-        with open(INTENTS_AND_RESPONSES_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"intents": {}, "responses": {}}
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Erreur de syntaxe dans {INTENTS_AND_RESPONSES_FILE}: {e}")
+    return knowledge_store.get("intents_and_responses")
 
 def load_glossary():
-    try:
-        with open(GLOSSARY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"terms": {}}
+    return knowledge_store.get("glossary")
+
+# Questions sans intention : journal en ajout seul, fusionné en arrière-plan dans le corpus
+unknown_questions = QuestionJournal(
+    UNKNOWN_QUESTIONS_JOURNAL,
+    INTENTS_AND_QUESTIONS_FILE,
+    flush_interval=JOURNAL_FLUSH_INTERVAL,
+    compact_interval=JOURNAL_COMPACT_INTERVAL
+)
+
+# Statistiques d'usage : compteurs en mémoire fusionnés périodiquement dans statistics.json
+live_statistics = LiveStatistics(
+    STATISTICS_FILE,
+    STATISTICS_SKETCH_FILE,
+    top_k=STATISTICS_TOP_K,
+    flush_interval=STATISTICS_FLUSH_INTERVAL
+)
+
+def record_statistics(response_data):
+    # Les requêtes d'amorçage du démarrage ne sont pas comptées
+    if warm_up_done.is_set():
+        live_statistics.record(response_data["intent"], response_data["keywords"])
+
+# Versions du modèle de langue : chaque processus recharge la version en service en arrière-plan
+model_versions = ModelVersions(
+    MODEL_VERSIONS_DIRECTORY,
+    load=lambda path: configure_nlp(spacy.load(path)),
+    on_change=lambda loaded_nlp, version: install_nlp(loaded_nlp),
+    keep=MODEL_VERSIONS_KEEP,
+    interval=MODEL_RELOAD_INTERVAL
+)
+
+# Publier un modèle entraîné ; ce processus le charge aussitôt, les autres au prochain passage
+def publish_trained_nlp(trained_nlp):
+    version = model_versions.publish(trained_nlp)
+    model_versions.refresh()
+    return version
+
+# Entraînements lancés par /train, exécutés et repris en arrière-plan
+train_jobs = TrainJobs(
+    TRAIN_JOBS_DIRECTORY,
+    BASE_MODEL,
+    publish_trained_nlp,
+    losses_file=TRAINING_LOSSES_FILE,
+    epochs=TRAIN_EPOCHS
+)
+
+def build_corpus(intents_and_questions):
+    return [entry['text'] for entry in intents_and_questions]
+
+def load_corpus():
+    return knowledge_store.derive("intents_and_questions", build_corpus)
+
+# Contexte d'analyse calculé avec le profil de pipeline nécessaire (voir pipeline_profiles.py)
+def analysis_context(text, profile="analysis"):
+    current_nlp = nlp
+    with STAGE_SECONDS.time("parse"):
+        doc = parse(current_nlp, text, profile)
+    DOC_TOKENS.observe(len(doc))
+    return AnalysisContext(current_nlp, text, doc)
+
+# Termes (lemmes et formes) de chaque question du corpus, pour la table IDF
+# Le parser et la NER ne servent pas à la lemmatisation
+def corpus_terms(texts):
+    for text, doc in zip(texts, parse_many(nlp, texts, "terms")):
+        yield AnalysisContext(nlp, text, doc).terms
+
+tfidf_index = TfidfIndex(corpus_terms)
+
+# Mots-clés et vecteur (question et mots-clés) de chaque question du corpus, pour le regroupement
+def question_features(texts):
+    current_nlp = nlp
+    for text, doc in zip(texts, parse_many(current_nlp, texts, "terms")):
+        context = AnalysisContext(current_nlp, text, doc)
+        keywords = context.candidate_keywords
+        vectors = [context.vector]
+        if keywords:
+            vectors.append(keyword_vectors.matrix(keywords).mean(axis=0))
+        yield keywords, question_vector(*vectors)
+
+# Groupes de questions publiés dans clusters.json, un seul processus à la fois
+cluster_engine = ClusterEngine(
+    question_features,
+    load_corpus,
+    CLUSTER_SNAPSHOTS_DIRECTORY,
+    CLUSTERS_FILE,
+    keep=CLUSTER_SNAPSHOTS_KEEP,
+    interval=CLUSTERING_INTERVAL
+)
 
-def load_json_file(file_path):
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Erreur de syntaxe dans {file_path}: {e}")  
-    
 def extract_entities(text):
-    doc = nlp(text)
-    entities = [(ent.text, ent.label_) for ent in doc.ents]
-    return entities
+    return analysis_context(text, "entities").entities
 
 def train_intent_classifier():
     intents_and_questions = load_intents_and_questions()
@@ -102,62 +301,98 @@ def train_intent_classifier():
     X = vectorizer.fit_transform(texts)
     y = labels
 
-    # Entraîner un modèle Naive Bayes
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # Précision indicative sur 20 % des questions tenues à l'écart
+    if len(texts) >= 5:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        held_out = MultinomialNB().fit(X_train, y_train)
+        print(f"Classificateur d'intention : précision {held_out.score(X_test, y_test):.2f} sur {len(y_test)} questions tenues à l'écart")
+
+    # Le modèle servi apprend sur tout le corpus, comme le classificateur en ligne (OnlineIntentModel)
     classifier = MultinomialNB()
-    classifier.fit(X_train, y_train)
+    classifier.fit(X, y)
 
      # Retourner le classificateur entraîné et le vectoriseur pour les prédictions futures
     return classifier, vectorizer
 
-# Charger le classificateur et le vectoriseur
-intent_classifier, vectorizer = train_intent_classifier()
+# Charger l'artefact du classificateur correspondant au corpus actuel,
+# ou l'entraîner et l'enregistrer s'il n'existe pas encore
+def load_intent_model():
+    if INTENT_ONLINE_LEARNING:
+        model = OnlineIntentModel()
+        sync_online_intent_model(model)
+        return model
+
+    data_hash = training_data_hash(load_intents_and_questions())
+    model = IntentModel.load(INTENT_MODEL_DIRECTORY, data_hash)
+    if model is not None:
+        return model
+
+    classifier, vectorizer = train_intent_classifier()
+    model = IntentModel.from_classifier(classifier, vectorizer, data_hash)
+    try:
+        model.save(INTENT_MODEL_DIRECTORY)
+        prune_artifacts(INTENT_MODEL_DIRECTORY, INTENT_MODEL_KEEP)
+        # Relire l'artefact pour partager les pages projetées avec les autres workers
+        model = IntentModel.load(INTENT_MODEL_DIRECTORY, data_hash) or model
+    except OSError as e:
+        print(f"Impossible d'enregistrer le classificateur d'intention: {e}")
+    return model
+
+# Intentions déclarées : connues du classificateur en ligne dès le départ
+def known_intents():
+    return list(load_intents_and_responses().get("intents", {}))
+
+# Appliquer au classificateur en ligne les changements du corpus (corrections, questions ajoutées)
+def sync_online_intent_model(model):
+    snapshot = knowledge_store.snapshot("intents_and_questions")
+    if model.generation != snapshot.generation:
+        model.sync(snapshot.data, known_intents(), snapshot.generation)
+
+def refresh_intent_model():
+    if isinstance(intent_model, OnlineIntentModel):
+        sync_online_intent_model(intent_model)
 
 # Prédire l'intention avec le classificateur
 def predict_intent(text):
-    X = vectorizer.transform([text])
-    predicted_intent = intent_classifier.predict(X)
-    return predicted_intent[0]
+    refresh_intent_model()
+    return intent_model.predict([text])[0]
+
+# Prédire les intentions d'un lot de textes en une seule transformation
+def predict_intents(texts):
+    refresh_intent_model()
+    return intent_model.predict(texts)
 
 # Fonction d'extraction des mots-clés améliorée
 # Inclure les types de mots, puis appliquer une pondération contextuelle
+# Le contexte d'analyse fournit le Doc déjà calculé : aucun nouvel appel à nlp()
 
-def extract_keywords_refined(text, corpus):
-    processed_text = preprocess_text(text)
+def extract_keywords_refined(context, corpus):
+    if not isinstance(context, AnalysisContext):
+        context = analysis_context(context, "terms")
 
-    if processed_text is None or processed_text.strip() == "":
+    processed_text = context.processed_text
+    if processed_text.strip() == "":
         return []
 
     # Extraire les mots-clés avec des types élargis
-    keywords_spacy = [
-        token.lemma_ for token in nlp(processed_text)
-        if token.pos_ in ["NOUN", "VERB", "PROPN", "ADJ", "PRON"]  or token.text.lower() in ["potins", "numériques"]
-    ]
+    keywords_spacy = context.candidate_keywords
+    if not keywords_spacy:
+        return []
 
-    # Forcer l'ajout des mots "potins" et "numériques" s'ils apparaissent dans le texte original
-    if "potins" in text.lower() and "potins" not in keywords_spacy:
-        keywords_spacy.append("potins")
-    if "numériques" in text.lower() and "numériques" not in keywords_spacy:
-        keywords_spacy.append("numériques")
-    
-
-    # Étape 1 : Calcul du score TF-IDF sur le corpus pour pondérer les mots-clés
-    vectorizer = TfidfVectorizer(stop_words=normalized_stop_words, vocabulary=keywords_spacy)
-    vectorizer.fit(corpus)
-    response_vector = vectorizer.transform([processed_text])
-
-    scores = response_vector.toarray().flatten()
-    feature_names = vectorizer.get_feature_names_out()
-    keywords_with_scores = [(feature_names[i], scores[i]) for i in range(len(scores)) if scores[i] > 0]
+    # Étape 1 : Score TF-IDF à partir de la table IDF du corpus, sans réajustement
+    with STAGE_SECONDS.time("tfidf"):
+        tfidf_index.sync(corpus)
+        scores = tfidf_index.scores(context.term_counts, keywords_spacy)
+    keywords_with_scores = [(keyword, score) for keyword, score in scores.items() if score > 0]
     sorted_keywords = sorted(keywords_with_scores, key=lambda x: x[1], reverse=True)
 
     # Étape 2 : Ajouter la similarité des vecteurs pour filtrer les mots les plus pertinents
-    full_vector = nlp(processed_text).vector
     keyword_scores = []
-    for keyword, tfidf_score in sorted_keywords:
-        similarity = nlp(keyword).vector @ full_vector / (np.linalg.norm(nlp(keyword).vector) * np.linalg.norm(full_vector))
-        final_score = 0.5 * tfidf_score + 0.5 * similarity  # Pondération égale entre TF-IDF et similarité
-        keyword_scores.append((keyword, final_score))
+    with STAGE_SECONDS.time("similarity"):
+        for keyword, tfidf_score in sorted_keywords:
+            similarity = context.keyword_similarity(keyword)
+            final_score = 0.5 * tfidf_score + 0.5 * similarity  # Pondération égale entre TF-IDF et similarité
+            keyword_scores.append((keyword, final_score))
 
     # Trier les mots-clés par score final décroissant
     refined_keywords = sorted(keyword_scores, key=lambda x: x[1], reverse=True)
@@ -167,89 +402,264 @@ def extract_keywords_refined(text, corpus):
 def preprocess_text(text):
     if not text:
         return ""
-
-     # Conserver les expressions interrogatives pour éviter de perdre du contexte
-    question_keywords = ["c'est quoi", "qu'est-ce que", "qu'est ce que", "quel", "comment"]
-    for keyword in question_keywords:
-        if keyword in text.lower():
-            text = text.lower().replace(keyword, keyword)  # Conserver l'expression interrogative
-
-    text=text.encode('utf-8').decode('utf-8')
-
-    # Analyse des mots clés pour les conserver
-    doc = nlp(text)
-    processed_tokens = [
-        token.text for token in doc 
-        if not token.is_stop or token.text.lower() in ["potins", "numériques"]
-    ]
-    
-    return ' '.join(processed_tokens)
+    return analysis_context(text, "tokens").processed_text
+
+# Les données statiques sont encodées une fois par génération, avec leur ETag
+# Avec page / per_page : groupes détaillés (mots-clés, taille, questions) du dernier instantané
+# Groupes du fichier d'exploration ({libellé: mots-clés}) sous la forme d'un instantané sans version
+def clusters_file_snapshot(clusters):
+    return {
+        "version": None,
+        "created_at": None,
+        "clusters": [{"label": label, "keywords": keywords} for label, keywords in clusters.items()]
+    }
 
 @app.route('/explore_clusters', methods=['GET'])
 def explore_clusters():
-    clusters = load_json_file(CLUSTERS_FILE)
-    if not clusters:
-        return jsonify({"error": "Clusters introuvables."}), 404
-    #return jsonify(clusters)
-    return Response(json.dumps(clusters, ensure_ascii=False), mimetype='application/json; charset=utf-8')
+    if "page" not in request.args and "per_page" not in request.args:
+        if not knowledge_store.get("clusters"):
+            return jsonify({"error": "Clusters introuvables."}), 404
+        return payload_response(knowledge_store.derive("clusters", encode_payload), request)
+
+    snapshot = knowledge_store.get("cluster_snapshot")
+    if not snapshot:
+        # Aucun regroupement publié : paginer le fichier d'exploration existant
+        if not knowledge_store.get("clusters"):
+            return jsonify({"error": "Clusters introuvables."}), 404
+        snapshot = knowledge_store.derive("clusters", clusters_file_snapshot)
+    try:
+        page = int(request.args.get("page", 1))
+        per_page = int(request.args.get("per_page", CLUSTERS_PER_PAGE))
+    except ValueError:
+        return jsonify({"error": "page et per_page doivent être des entiers."}), 400
+    page = max(1, page)
+    per_page = max(1, min(per_page, CLUSTERS_PER_PAGE_MAX))
+
+    clusters = snapshot["clusters"]
+    start = (page - 1) * per_page
+    return payload_response(encode_payload({
+        "version": snapshot["version"],
+        "created_at": snapshot["created_at"],
+        "total": len(clusters),
+        "page": page,
+        "per_page": per_page,
+        "clusters": clusters[start:start + per_page]
+    }), request)
 
 @app.route('/statistics', methods=['GET'])
 def get_statistics():
-    statistics = load_json_file(STATISTICS_FILE)
-    if not statistics:
+    if not knowledge_store.get("statistics"):
         return jsonify({"error": "Statistiques introuvables."}), 404
-    #return jsonify(statistics)
-    return Response(json.dumps(statistics, ensure_ascii=False), mimetype='application/json; charset=utf-8')
+    return payload_response(knowledge_store.derive("statistics", encode_payload), request)
       
 
-@app.route('/analyze_context', methods=['POST'])
-def analyze_context():
-    user_message = request.json.get('message', '').strip()
-    if not user_message:
-         return Response(
-            json.dumps({
-            "response": "Message vide.",
-            "keywords": [],
-            "intent": "unknown",
-            "context": "unknown",
-            "explanation": "Aucune analyse contextuelle n'a pu être effectuée."}, ensure_ascii=False),
-            content_type='application/json; charset=utf-8')
-
-     # Charger les intentions et réponses
-    intents_and_responses = load_intents_and_responses()
-    intents_and_questions = load_intents_and_questions()
-    corpus = [entry['text'] for entry in intents_and_questions]
-
+def empty_analysis(response):
+    return {
+        "response": response,
+        "keywords": [],
+        "intent": "unknown",
+        "context": "unknown",
+        "explanation": "Aucune analyse contextuelle n'a pu être effectuée."
+    }
+
+# Analyse complète d'un message à partir de son contexte (Doc déjà calculé)
+# L'intention peut être fournie quand elle a été prédite pour tout un lot
+def build_analysis(context, corpus, intents_and_responses, intent=None):
     # Étape 1 : Extraction des mots-clés affinée avec TF-IDF et similarité
-    keywords = extract_keywords_refined(user_message, corpus)
+    keywords = extract_keywords_refined(context, corpus)
+    KEYWORD_COUNT.observe(len(keywords))
     if not keywords:
-        return jsonify({
-            "response": "Aucun mot-clé détecté.",
-            "keywords": [],
-            "intent": "unknown",
-            "context": "unknown",
-            "explanation": "Aucune analyse contextuelle n'a pu être effectuée."
-        }), 200
+        return empty_analysis("Aucun mot-clé détecté.")
 
-    entities = extract_entities(user_message)
+    with STAGE_SECONDS.time("entities"):
+        entities = context.entities
 
     # Étape 2 : Détection de l'intention à l'aide du classificateur
-    intent = predict_intent(user_message)
+    if intent is None:
+        with STAGE_SECONDS.time("intent"):
+            intent = predict_intent(context.text)
 
     # Étape 3 : Générer la réponse
     response = intents_and_responses["responses"].get(intent, "Je ne suis pas sûr de comprendre votre demande.")
     explanation = f"Les mots-clés détectés sont : {', '.join(keywords)}. L'intention détectée est : {intent}."
-    # Créer une réponse JSON
-    response_data={
+    return {
         "response": response,
         "keywords": keywords,
         "intent": intent or "unknown",
         "context": intent or "unknown",
         "entities": entities,
         "explanation": explanation
-   }
-    print(json.dumps(response_data, ensure_ascii=False))
-    return Response(json.dumps(response_data, ensure_ascii=False).encode('utf-8'), mimetype='application/json; charset=utf-8')
+    }
+
+def analyze_message(message):
+    # Charger les intentions et réponses
+    intents_and_responses = load_intents_and_responses()
+    corpus = load_corpus()
+
+    # Un seul passage du pipeline spaCy pour tout le message
+    context = analysis_context(message)
+    return build_analysis(context, corpus, intents_and_responses)
+
+# Analyse d'une liste de messages : un seul nlp.pipe et une seule prédiction d'intention pour le lot
+def analyze_messages(messages, batch_size=ANALYZE_BATCH_SIZE, n_process=ANALYZE_N_PROCESS):
+    intents_and_responses = load_intents_and_responses()
+    corpus = load_corpus()
+
+    texts = [message for message in messages if message]
+    with STAGE_SECONDS.time("intent"):
+        intents = iter(predict_intents(texts))
+    docs = parse_many(nlp, texts, "analysis", batch_size=batch_size, n_process=n_process)
+
+    results = []
+    for message in messages:
+        if not message:
+            results.append(empty_analysis("Message vide."))
+            continue
+        with STAGE_SECONDS.time("parse"):
+            doc = next(docs)
+        DOC_TOKENS.observe(len(doc))
+        context = AnalysisContext(nlp, message, doc)
+        results.append(build_analysis(context, corpus, intents_and_responses, next(intents)))
+    return results
+
+# Fichiers de la base de connaissances lus par l'analyse d'un message
+ANALYSIS_FILES = ("intents_and_questions", "intents_and_responses")
+
+# Génération des données utilisées par l'analyse : corpus, intentions et réponses,
+# version du modèle de langue et artefact du classificateur. Elle change quand l'un
+# d'eux est rechargé ou réentraîné, ce qui invalide le cache d'analyse ; le glossaire,
+# les groupes et les statistiques n'y participent pas.
+def current_analysis_generation():
+    return analysis_generation(
+        knowledge_store.signatures(ANALYSIS_FILES),
+        model_versions.loaded,
+        getattr(intent_model, "data_hash", None)
+    )
+
+@app.route('/analyze_context', methods=['POST'])
+def analyze_context():
+    user_message = request.json.get('message', '').strip()
+    if not user_message:
+        return json_response(empty_analysis("Message vide."))
+
+    generation = current_analysis_generation()
+    response_data = analysis_cache.get(user_message, generation)
+    cached = response_data is not None
+    if not cached:
+        # Analyse exécutée dans le pool NLP borné
+        response_data = nlp_pool.run(analyze_message, user_message, timeout=NLP_POOL_TIMEOUT)
+        analysis_cache.put(user_message, generation, response_data)
+    record_statistics(response_data)
+    if not response_data["keywords"]:
+        return jsonify(response_data), 200
+
+    with STAGE_SECONDS.time("serialize"):
+        response = json_response(response_data)
+    request_log.sample(
+        "analyze_context",
+        intent=response_data["intent"],
+        keywords=response_data["keywords"],
+        entities=len(response_data.get("entities", [])),
+        cached=cached,
+        message_length=len(user_message)
+    )
+    return response
+
+
+@app.route('/analyze_batch', methods=['POST'])
+def analyze_batch():
+    messages = request.json.get('messages', [])
+    if not isinstance(messages, list):
+        return jsonify({"error": "Le champ 'messages' doit être une liste."}), 400
+
+    try:
+        batch_size = int(request.json.get('batch_size', ANALYZE_BATCH_SIZE))
+        n_process = int(request.json.get('n_process', ANALYZE_N_PROCESS))
+    except (TypeError, ValueError):
+        return jsonify({"error": "batch_size et n_process doivent être des entiers."}), 400
+    batch_size = max(1, batch_size)
+    n_process = max(1, min(n_process, os.cpu_count() or 1))
+
+    messages = [str(message or '').strip() for message in messages]
+    results = nlp_pool.run(analyze_messages, messages, batch_size=batch_size, n_process=n_process, timeout=NLP_POOL_TIMEOUT)
+
+    return json_response({"results": results})
+
+
+# Index des mots-clés d'intention, reconstruit seulement quand intents_and_responses.json change
+def build_intent_matcher(intents_and_responses):
+    return IntentMatcher(intents_and_responses.get("intents", {}))
+
+def load_intent_matcher():
+    return knowledge_store.derive("intents_and_responses", build_intent_matcher)
+
+def analyze_combined_message(message):
+    intents_and_responses = load_intents_and_responses()
+    context = analysis_context(message)
+    keywords = context.candidate_keywords
+    KEYWORD_COUNT.observe(len(keywords))
+
+    # Détection d'intention par mots-clés directs et expressions, en un seul parcours
+    with STAGE_SECONDS.time("intent_match"):
+        matches = load_intent_matcher().match(context.term_sequence)
+    detected_intent = matches[0][0] if matches else None
+    response = intents_and_responses["responses"].get(detected_intent, "Je ne suis pas sûr de comprendre votre demande.")
+    return {
+        "response": response,
+        "keywords": keywords,
+        "entities": context.entities,
+        "intent": detected_intent,
+        "intents": [{"intent": intent, "score": score} for intent, score in matches]
+    }
+
+@app.route('/analyze_combined', methods=['POST'])
+def analyze_question():
+    user_message = request.json.get('message', '')
+    response_data = nlp_pool.run(analyze_combined_message, user_message, timeout=NLP_POOL_TIMEOUT)
+    record_statistics(response_data)
+
+    # Question sans intention : ajout O(1) au journal, fusionné plus tard dans le corpus
+    if not response_data["intent"]:
+        unknown_questions.append({"text": user_message, "intent": "unknown"})
+
+    return jsonify(response_data)
+
+# Message contenu dans une ligne NDJSON : objet {"message": ...} ou {"text": ...}, chaîne JSON ou texte brut
+def parse_stream_line(line):
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        entry = json.loads(line)
+    except json.JSONDecodeError:
+        return line
+    if isinstance(entry, dict):
+        return str(entry.get("message", entry.get("text", "")) or "").strip()
+    if isinstance(entry, str):
+        return entry.strip()
+    return line
+
+# Analyse en flux : les lignes sont lues et analysées par lots, chaque résultat est
+# émis dès que son lot est traité, sans jamais conserver l'ensemble de l'entrée
+def analyze_stream(lines, batch_size=ANALYZE_BATCH_SIZE, analyze=analyze_messages):
+    messages = (message for message in map(parse_stream_line, lines) if message is not None)
+    while True:
+        batch = list(islice(messages, batch_size))
+        if not batch:
+            return
+        for message, result in zip(batch, analyze(batch, batch_size=batch_size)):
+            yield dumps({"message": message, **result}).decode("utf-8") + "\n"
+
+@app.route('/analyze_stream', methods=['POST'])
+def analyze_stream_route():
+    batch_size = max(1, request.args.get('batch_size', ANALYZE_BATCH_SIZE, type=int))
+    lines = (line.decode('utf-8', errors='replace') for line in request.stream)
+
+    # Le flux est déjà commencé : attendre une place dans le pool plutôt que de refuser le lot
+    def analyze(batch, batch_size):
+        return nlp_pool.run(analyze_messages, batch, batch_size=batch_size, block=True)
+
+    return Response(stream_with_context(analyze_stream(lines, batch_size, analyze)), mimetype='application/x-ndjson; charset=utf-8')
 
 
 @app.route("/calculate_relationships", methods=["POST"])
@@ -259,39 +669,35 @@ def calculate_relationships():
     if len(keywords) < 2:
         return jsonify({"relationships": []})
 
-    relationships = []
-    similarities = []
-
-     # Calcul des similarités pour déterminer la médiane
-    for i in range(len(keywords)):
-        for j in range(i + 1, len(keywords)):
-            vec1 = nlp(keywords[i]).vector
-            vec2 = nlp(keywords[j]).vector
-            similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-            similarities.append(similarity)
-
-    # Calculer un seuil dynamique basé sur la médiane
-    if similarities:
-        dynamic_threshold = np.median(similarities)
-    else:
-        dynamic_threshold = 0.2  # valeur par défaut si aucune similarité calculée
-
-    # Création des relations si la similarité dépasse le seuil dynamique
-    for i in range(len(keywords)):
-        for j in range(i + 1, len(keywords)):
-            vec1 = nlp(keywords[i]).vector
-            vec2 = nlp(keywords[j]).vector
-            similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-            if similarity > dynamic_threshold:
-                relationships.append({
-                    "source": keywords[i],
-                    "target": keywords[j],
-                    "weight": float(round(similarity, 2))
-                })
-
-    #return jsonify({"relationships": relationships})
-    response_data={"relationships": relationships}
-    return Response(json.dumps(response_data, ensure_ascii=False), mimetype='application/json; charset=utf-8')
+    # Similarités calculées en une seule multiplication matricielle,
+    # seuil dynamique basé sur la médiane
+    relationships = nlp_pool.run(keyword_vectors.relationships, keywords, timeout=NLP_POOL_TIMEOUT)
+
+    return json_response({"relationships": relationships})
+
+
+def related_keywords(keyword, limit):
+    index = neighbour_index
+    if index is None:
+        return []
+    # Le mot lui-même et ceux de l'expression ne sont pas des mots liés
+    exclude = {keyword.lower()}.union(word.lower() for word in keyword.split())
+    neighbours = index.search(keyword_vectors.vector(keyword), limit, RELATED_KEYWORDS_PROBES, exclude)
+    return [{"keyword": word, "similarity": round(similarity, 2)} for word, similarity in neighbours]
+
+@app.route("/related_keywords", methods=["POST"])
+def get_related_keywords():
+    keyword = request.json.get("keyword", "").strip()
+    if not keyword:
+        return jsonify({"error": "Aucun mot-clé fourni."}), 400
+    try:
+        limit = int(request.json.get("limit", RELATED_KEYWORDS_LIMIT))
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit doit être un entier."}), 400
+    limit = max(1, min(limit, RELATED_KEYWORDS_MAX))
+
+    related = nlp_pool.run(related_keywords, keyword, limit, timeout=NLP_POOL_TIMEOUT)
+    return json_response({"keyword": keyword, "related": related})
 
 
 @app.route('/glossary', methods=['POST'])
@@ -300,56 +706,139 @@ def get_glossary_term():
     if not term:
         return jsonify({"error": "Aucun terme fourni."}), 400
 
-    glossary = load_glossary()
-    definition = glossary["terms"].get(term, None)
-    if not definition:
+    payload = knowledge_store.derive("glossary", encode_glossary).get(term)
+    if payload is None:
         return jsonify({"error": f"Terme '{term}' introuvable dans le glossaire."}), 404
 
-    #return jsonify({"term": term, "definition": definition})
-    response_data={"term": term, "definition": definition}
-    return Response(json.dumps(response_data, ensure_ascii=False), mimetype='application/json; charset=utf-8')
+    return payload_response(payload, request)
+
+
+# Réponse de chaque terme du glossaire, encodée une fois par génération du fichier
+def encode_glossary(glossary):
+    return {
+        term: encode_payload({"term": term, "definition": definition})
+        for term, definition in glossary.get("terms", {}).items() if definition
+    }
 
 
 @app.route('/train', methods=['POST'])
 def train():
-    with open(INTENTS_AND_QUESTIONS_FILE, 'r') as f:
-        training_data = json.load(f)
+    training_data = load_intents_and_questions()
 
     # Vérifier que les données sont sous forme de liste
     if not isinstance(training_data, list):
         return jsonify({"error": "Les données de formation doivent être une liste."}), 400
 
-    examples = []
     for item in training_data:
         # Vérifier que chaque élément est un dictionnaire avec les clés 'text' et 'intent'
         if not isinstance(item, dict) or 'text' not in item or 'intent' not in item:
             return jsonify({"error": "Chaque entrée de formation doit être un dictionnaire avec les clés 'text' et 'intent'."}), 400
 
-        doc = nlp.make_doc(item["text"])
-        examples.append(Example.from_dict(doc, {"cats": {item["intent"]: 1.0}}))
+    # L'entraînement tourne en arrière-plan : la requête renvoie l'identifiant du job
+    try:
+        job = train_jobs.submit(training_data)
+    except JobPending as e:
+        # Un seul entraînement à la fois : le client suit le job existant puis relance la demande
+        return jsonify({
+            "error": "Un entraînement est déjà en attente ou en cours.",
+            "job_id": e.job["id"],
+            "status": e.job["status"]
+        }), 409, {"Location": f"/train/{e.job['id']}"}
+    return jsonify({"message": "Training queued", "job_id": job["id"], "status": job["status"]}), 202, {"Location": f"/train/{job['id']}"}
+
+
+# Versions du modèle de langue : publiées, en service et chargée par ce processus
+@app.route('/model', methods=['GET'])
+def model_status():
+    return jsonify({
+        "versions": model_versions.versions(),
+        "current": model_versions.current(),
+        "loaded": model_versions.loaded
+    })
+
+
+# Revenir à la version précédente (ou à celle indiquée) ; les workers la rechargent en arrière-plan
+@app.route('/model/rollback', methods=['POST'])
+def model_rollback():
+    version = (request.get_json(silent=True) or {}).get("version")
+    version = model_versions.rollback(version)
+    if version is None:
+        return jsonify({"error": "Aucune version disponible pour le retour arrière."}), 404
+    model_versions.refresh()
+    return jsonify({"message": "Retour arrière effectué.", "current": version})
+
+
+# Statistiques du cache et du pool, lues au moment de l'export
+@metrics.collector
+def collect_runtime_stats():
+    cache = analysis_cache.stats()
+    pool = nlp_pool.stats()
+    return [
+        ("spacy_analysis_cache_lookups_total", "counter", "Recherches dans le cache d'analyse par résultat.", [
+            ({"result": "hit"}, cache["hits"]),
+            ({"result": "backend_hit"}, cache["backend_hits"]),
+            ({"result": "miss"}, cache["misses"]),
+        ]),
+        ("spacy_analysis_cache_hit_ratio", "gauge", "Part des recherches servies par le cache.", [({}, cache["hit_ratio"])]),
+        ("spacy_analysis_cache_entries", "gauge", "Entrées dans le cache local.", [({}, cache["size"])]),
+        ("spacy_analysis_cache_evictions_total", "counter", "Entrées évincées du cache local.", [({}, cache["evictions"])]),
+        ("spacy_nlp_pool_pending", "gauge", "Tâches en cours ou en attente dans le pool.", [({}, pool["pending"])]),
+        ("spacy_nlp_pool_rejected_total", "counter", "Tâches refusées faute de place dans le pool.", [({}, pool["rejected"])]),
+        ("spacy_knowledge_generation", "gauge", "Génération de la base de connaissances.", [({}, knowledge_store.generation)]),
+        ("spacy_log_events_dropped_total", "counter", "Événements de journal abandonnés (file pleine).", [({}, request_log.dropped)]),
+    ]
+
+# Métriques au format d'exposition texte de Prometheus (propres à chaque worker)
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 
-    # Initialiser l'optimiseur avec des paramètres ajustés
-    optimizer = nlp.create_optimizer()
-    optimizer.learn_rate = 0.001  # Ajuster le taux d'apprentissage
+# Profileur par échantillonnage, activable à chaud quand SPACY_PROFILER=1
+@app.route('/profiler', methods=['GET'])
+def profiler_report():
+    if not PROFILER_ENABLED:
+        return jsonify({"error": "Profileur désactivé."}), 404
+    if request.args.get('format') == 'collapsed':
+        return Response(profiler.collapsed(), mimetype='text/plain; charset=utf-8')
+    return jsonify(profiler.status())
 
-    # Ajouter un suivi des métriques de performance
-    all_losses = []  # Liste pour enregistrer les pertes
-    for epoch in range(20):  # Augmenter le nombre d'époques
-        random.shuffle(examples)
-        losses = {}
-        for example in examples:
-            nlp.update([example], sgd=optimizer, losses=losses)
-        all_losses.append(losses)
-        print(f"Epoch {epoch+1}, Loss: {losses}")  # Ajouter un affichage des pertes pour le suivi
 
-    # Sauvegarder les métriques de perte dans un fichier pour une analyse ultérieure
-    with open('training_losses.json', 'w') as f:
-        json.dump(all_losses, f, indent=4)
+@app.route('/profiler/start', methods=['POST'])
+def profiler_start():
+    if not PROFILER_ENABLED:
+        return jsonify({"error": "Profileur désactivé."}), 404
+    options = request.get_json(silent=True) or {}
+    try:
+        interval = max(0.001, float(options.get("interval", 0.005)))
+        duration = float(options["duration"]) if options.get("duration") else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "interval et duration doivent être des nombres."}), 400
+    profiler.start(interval, duration)
+    return jsonify(profiler.status())
+
+
+@app.route('/profiler/stop', methods=['POST'])
+def profiler_stop():
+    if not PROFILER_ENABLED:
+        return jsonify({"error": "Profileur désactivé."}), 404
+    profiler.stop()
+    return jsonify(profiler.status())
+
+
+# Efficacité du cache d'analyse et occupation du pool
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({"analysis_cache": analysis_cache.stats(), "nlp_pool": nlp_pool.stats()})
 
-    # Sauvegarder le modèle après l'entraînement
-    nlp.to_disk('model_directory')
 
-    return jsonify({"message": "Training completed and model saved"})
+# État d'un entraînement : statut, époque atteinte et pertes par époque
+@app.route('/train/<job_id>', methods=['GET'])
+def train_status(job_id):
+    job = train_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Entraînement introuvable."}), 404
+    return jsonify(job)
 
 
 @app.route('/update-intent', methods=['POST'])
@@ -361,18 +850,153 @@ def update_intent():
     if not question or not new_intent:
         return jsonify({"error": "Texte ou intention manquante."}), 400
 
-    intents_and_questions = load_intents_and_questions()
-    for entry in intents_and_questions:
-        if entry["text"] == question:
-            entry["intent"] = new_intent
-            break
-    else:
-        return jsonify({"error": "Question introuvable."}), 404
-
-    with open(INTENTS_AND_QUESTIONS_FILE, "w") as f:
-        json.dump(intents_and_questions, f, indent=4)
+    # Même verrou que le compacteur du journal, qui réécrit aussi ce fichier :
+    # relire et réécrire sous verrou pour ne perdre aucune question fusionnée entre-temps
+    with file_lock(INTENTS_AND_QUESTIONS_FILE):
+        knowledge_store.refresh()
+        intents_and_questions = copy.deepcopy(load_intents_and_questions())
+        for entry in intents_and_questions:
+            if entry["text"] == question:
+                entry["intent"] = new_intent
+                break
+        else:
+            return jsonify({"error": "Question introuvable."}), 404
+
+        write_json_atomic(INTENTS_AND_QUESTIONS_FILE, intents_and_questions)
+    knowledge_store.refresh()
+    # En mode en ligne, la correction est prise en compte immédiatement
+    refresh_intent_model()
 
     return jsonify({"message": "Intention mise à jour avec succès."})
 
+# Remplacer le modèle servi : les requêtes en cours terminent avec l'ancien
+def install_nlp(loaded_nlp):
+    global nlp, keyword_vectors, neighbour_index
+    # Vecteurs des mots-clés lus directement dans la table du vocabulaire
+    keyword_vectors = KeywordVectors(loaded_nlp)
+    # Index des plus proches voisins, construit une fois par table de vecteurs
+    neighbour_index = load_neighbour_index(loaded_nlp, NEIGHBOUR_INDEX_DIRECTORY, related_stop_words)
+    nlp = loaded_nlp
+
+def load_models():
+    global intent_model
+    install_nlp(load_nlp())
+    # Charger le classificateur depuis son artefact sur disque
+    intent_model = load_intent_model()
+
+# Démarrage en arrière-plan : chargement des modèles, table IDF puis requêtes d'amorçage
+def warm_up():
+    global warm_up_error
+    try:
+        load_models()
+        models_loaded.set()
+
+        tfidf_index.sync(load_corpus())
+        client = app.test_client()
+        for message in WARM_UP_MESSAGES:
+            client.post('/analyze_context', json={"message": message})
+        client.post('/calculate_relationships', json={"keywords": WARM_UP_KEYWORDS})
+    except Exception as e:
+        warm_up_error = str(e)
+        print(f"Échec du démarrage du service: {e}")
+    finally:
+        warm_up_done.set()
+
+def start_warm_up():
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+# Threads d'arrière-plan qui écrivent dans les fichiers partagés (journal, statistiques,
+# entraînements, regroupements) ou rechargent le modèle. Lancés seulement par les processus
+# qui servent les requêtes (workers, voir after_fork, ou serveur de développement) : ni le
+# maître gunicorn ni les outils qui importent le service (analyze_stream.py) ne les exécutent.
+def start_background():
+    unknown_questions.start()
+    live_statistics.start()
+    train_jobs.start()
+    threading.Thread(target=start_model_background, name="model-background", daemon=True).start()
+
+# Threads qui se servent du modèle : après son chargement
+def start_model_background():
+    models_loaded.wait()
+    model_versions.start_watching()
+    if CLUSTERING_ENABLED:
+        cluster_engine.start()
+
+def wait_until_ready(timeout=None):
+    """
+    Attend la fin du démarrage (utilisé par les outils en ligne de commande).
+    """
+    if not warm_up_done.wait(timeout):
+        raise TimeoutError("Le service n'a pas terminé son démarrage.")
+    if warm_up_error:
+        raise RuntimeError(f"Échec du démarrage du service: {warm_up_error}")
+
+# Réinitialisation dans un worker issu d'un fork (voir gunicorn.conf.py) :
+# les modèles chargés par le processus maître sont partagés, les threads et verrous sont recréés
+def after_fork():
+    knowledge_store.after_fork()
+    tfidf_index.after_fork()
+    unknown_questions.after_fork()
+    live_statistics.after_fork()
+    train_jobs.after_fork()
+    model_versions.after_fork()
+    cluster_engine.after_fork()
+    if isinstance(intent_model, OnlineIntentModel):
+        intent_model.after_fork()
+    nlp_pool.after_fork()
+    analysis_cache.after_fork()
+    metrics.after_fork()
+    profiler.after_fork()
+    request_log.after_fork()
+    start_background()
+
+# File d'attente du pool pleine : refuser rapidement plutôt que d'accumuler la latence
+@app.errorhandler(PoolSaturated)
+def pool_saturated(e):
+    return jsonify({"error": "Service surchargé, réessayez plus tard."}), 503, {"Retry-After": "1"}
+
+@app.errorhandler(FutureTimeoutError)
+def pool_timeout(e):
+    return jsonify({"error": "Délai de traitement dépassé."}), 503, {"Retry-After": "1"}
+
+# Durée et nombre de requêtes par route (enregistré avant require_models pour mesurer aussi les refus)
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    started = g.get("request_started")
+    endpoint = request.endpoint or "unmatched"
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint, request.method)
+    REQUESTS_TOTAL.inc(endpoint, request.method, str(response.status_code))
+    return response
+
+@app.before_request
+def require_models():
+    if request.endpoint is None or request.endpoint in ENDPOINTS_WITHOUT_MODEL:
+        return None
+    if not models_loaded.is_set():
+        return jsonify({"error": "Service en cours de démarrage."}), 503, {"Retry-After": "5"}
+    return None
+
+# Le processus répond : le serveur est démarré
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({"status": "ok"})
+
+# Le service est prêt à traiter les requêtes d'analyse
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    if warm_up_error:
+        return jsonify({"status": "error", "error": warm_up_error}), 503
+    if not warm_up_done.is_set():
+        return jsonify({"status": "starting", "models_loaded": models_loaded.is_set()}), 503
+    return jsonify({"status": "ready"})
+
+start_warm_up()
+
 if __name__ == "__main__":
+    start_background()
     app.run(port=5000)
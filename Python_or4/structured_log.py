@@ -0,0 +1,109 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Une ligne JSON par événement : horodatage, niveau, nom de l'événement et champs.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    File bornée : si l'écriture prend du retard, les événements sont abandonnés
+    (et comptés) plutôt que de bloquer la requête.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredLogger:
+    """
+    Journal structuré, échantillonné et non bloquant : la requête ne fait que
+    placer l'événement dans une file ; un thread l'écrit en JSON sur le flux.
+    Les événements échantillonnés (sample()) ne sont retenus qu'avec la
+    probabilité `sample_rate` ; les avertissements et erreurs le sont toujours.
+    """
+
+    def __init__(self, name, sample_rate=1.0, level=logging.INFO, stream=None, queue_size=10000):
+        self.sample_rate = sample_rate
+        self.queue_size = queue_size
+        self.stream = stream
+        self.logger = logging.getLogger(name)
+        self.logger.setLevel(level)
+        self.logger.propagate = False
+        self._listener = None
+        self._handler = None
+        self._start()
+        atexit.register(self.stop)
+
+    def _start(self):
+        log_queue = queue.Queue(self.queue_size)
+        handler = DroppingQueueHandler(log_queue)
+        output = logging.StreamHandler(self.stream or sys.stderr)
+        output.setFormatter(JsonFormatter())
+        if self._handler is not None:
+            self.logger.removeHandler(self._handler)
+        self.logger.addHandler(handler)
+        self._handler = handler
+        self._listener = QueueListener(log_queue, output)
+        self._listener.start()
+
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def after_fork(self):
+        # Le thread d'écriture n'existe pas dans le processus enfant
+        self._listener = None
+        self._start()
+
+    @property
+    def dropped(self):
+        return self._handler.dropped
+
+    def log(self, level, event, **fields):
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, event, extra={"fields": fields})
+
+    def info(self, event, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+    def sample(self, event, **fields):
+        """
+        Événement de routine (une ligne par requête) retenu selon sample_rate.
+        """
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            self.log(logging.INFO, event, sampled=self.sample_rate, **fields)
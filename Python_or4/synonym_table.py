@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+
+# Version du format de la table sur disque (2 : expressions séparées par des espaces)
+TABLE_VERSION = 2
+# Synonymes conservés par mot-clé, et similarité minimale avec le mot-clé
+SYNONYMS_PER_KEYWORD = 5
+MIN_SYNONYM_SIMILARITY = 0.3
+
+
+def wordnet_lemma_names(wordnet, word):
+    """
+    Lemmes français des synsets du mot (parcours de WordNet/OMW).
+    """
+    return {
+        lemma.name()
+        for synset in wordnet.synsets(word, lang="fra")
+        for lemma in synset.lemmas(lang="fra")
+    }
+
+
+def rank_synonyms(word, candidates, keyword_vectors, limit=SYNONYMS_PER_KEYWORD, min_similarity=MIN_SYNONYM_SIMILARITY):
+    """
+    Synonymes triés par similarité vectorielle avec le mot, limités à `limit`.
+    Les candidats sans vecteur ou trop éloignés sont écartés : ils ne produiraient
+    aucune relation et alourdiraient le calcul des paires.
+    Les expressions sont renvoyées avec des espaces, comme elles sont classées.
+    """
+    # WordNet sépare les mots des expressions par "_"
+    candidates = sorted({candidate.replace("_", " ") for candidate in candidates} - {word.replace("_", " ")})
+    if not candidates:
+        return []
+    matrix = keyword_vectors.matrix(candidates)
+    similarities = matrix @ keyword_vectors.normalized_vector(word)
+    order = np.argsort(-similarities, kind="stable")[:limit]
+    return [candidates[i] for i in order if similarities[i] >= min_similarity]
+
+
+def build_synonym_table(wordnet, keyword_vectors, limit=SYNONYMS_PER_KEYWORD, min_similarity=MIN_SYNONYM_SIMILARITY):
+    """
+    Table mot -> synonymes classés pour tous les lemmes français de WordNet/OMW.
+    """
+    synonyms = {}
+    for word in wordnet.all_lemma_names(lang="fra"):
+        ranked = rank_synonyms(word, wordnet_lemma_names(wordnet, word), keyword_vectors, limit, min_similarity)
+        if ranked:
+            synonyms[word] = ranked
+    return {
+        "version": TABLE_VERSION,
+        "limit": limit,
+        "min_similarity": min_similarity,
+        "synonyms": synonyms
+    }
+
+
+class SynonymTable:
+    """
+    Table de synonymes précalculée hors ligne (voir build_synonyms.py) :
+    l'enrichissement d'un mot-clé coûte une recherche dans un dictionnaire.
+    """
+
+    def __init__(self, synonyms):
+        self.synonyms = synonyms
+
+    @classmethod
+    def load(cls, path):
+        """
+        Charge la table, None si le fichier est absent ou d'une autre version.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                table = json.load(f)
+        except FileNotFoundError:
+            return None
+        if table.get("version") != TABLE_VERSION:
+            return None
+        return cls(table["synonyms"])
+
+    def get(self, word):
+        return self.synonyms.get(word.lower(), [])
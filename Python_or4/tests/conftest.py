@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les modules du service sont importés depuis Python_or4, comme le fait gunicorn
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
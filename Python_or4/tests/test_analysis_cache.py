@@ -0,0 +1,126 @@
+import pytest
+
+import analysis_cache
+from analysis_cache import AnalysisCache, LocalBackend, analysis_generation
+from knowledge_store import KnowledgeStore
+from question_journal import write_json_atomic
+
+ANALYSIS_FILES = ("intents_and_questions", "intents_and_responses")
+RESULT = {"intent": "IA_definition", "keywords": ["intelligence"]}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(analysis_cache.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def paths(tmp_path):
+    paths = {
+        "intents_and_questions": str(tmp_path / "intents_and_questions.json"),
+        "intents_and_responses": str(tmp_path / "intents_and_responses.json"),
+        "statistics": str(tmp_path / "statistics.json"),
+    }
+    write_json_atomic(paths["intents_and_questions"], [{"text": "Qu'est-ce que l'IA ?", "intent": "IA_definition"}])
+    write_json_atomic(paths["intents_and_responses"], {"intents": {}, "responses": {"IA_definition": "..."}})
+    write_json_atomic(paths["statistics"], {"intents": {}, "keywords": {}})
+    return paths
+
+
+@pytest.fixture
+def store(paths):
+    store = KnowledgeStore()
+    for name, path in paths.items():
+        store.register(name, path, {})
+    return store
+
+
+def generation(store, model_version="1", data_hash="abc"):
+    return analysis_generation(store.signatures(ANALYSIS_FILES), model_version, data_hash)
+
+
+def test_normalized_messages_share_an_entry():
+    cache = AnalysisCache()
+    cache.put("Qu'est-ce que  l'IA ?", "g", RESULT)
+
+    assert cache.get("qu'est-ce que l'ia ?", "g") == RESULT
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("name", ANALYSIS_FILES)
+def test_rewriting_an_analysis_file_turns_a_hit_into_a_miss(store, paths, name):
+    cache = AnalysisCache()
+    cache.put("Bonjour", generation(store), RESULT)
+    assert cache.get("Bonjour", generation(store)) == RESULT
+
+    write_json_atomic(paths[name], store.get(name))
+    assert store.refresh() == [name]
+
+    assert cache.get("Bonjour", generation(store)) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_statistics_file_does_not_invalidate(store, paths):
+    cache = AnalysisCache()
+    cache.put("Bonjour", generation(store), RESULT)
+
+    write_json_atomic(paths["statistics"], {"intents": {"IA_definition": 1}, "keywords": {}})
+    assert store.refresh() == ["statistics"]
+
+    assert cache.get("Bonjour", generation(store)) == RESULT
+
+
+@pytest.mark.parametrize("changed", [{"model_version": "2"}, {"data_hash": "def"}])
+def test_new_model_version_or_classifier_turns_a_hit_into_a_miss(store, changed):
+    cache = AnalysisCache()
+    cache.put("Bonjour", generation(store), RESULT)
+    assert cache.get("Bonjour", generation(store)) == RESULT
+
+    assert cache.get("Bonjour", generation(store, **changed)) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = AnalysisCache(ttl=60)
+    cache.put("Bonjour", "g", RESULT)
+
+    clock.now += 59
+    assert cache.get("Bonjour", "g") == RESULT
+    clock.now += 2
+    assert cache.get("Bonjour", "g") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnalysisCache(max_size=2)
+    cache.put("un", "g", {"n": 1})
+    cache.put("deux", "g", {"n": 2})
+    # "un" redevient le plus récent : "deux" part quand "trois" arrive
+    assert cache.get("un", "g") == {"n": 1}
+    cache.put("trois", "g", {"n": 3})
+
+    assert cache.get("deux", "g") is None
+    assert cache.get("un", "g") == {"n": 1}
+    assert cache.get("trois", "g") == {"n": 3}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_shared_backend_serves_other_processes_and_expires(clock):
+    backend = LocalBackend()
+    AnalysisCache(ttl=60, backend=backend).put("Bonjour", "g", RESULT)
+    other = AnalysisCache(ttl=60, backend=backend)
+
+    assert other.get("Bonjour", "g") == RESULT
+    assert other.stats()["backend_hits"] == 1
+    clock.now += 61
+    assert AnalysisCache(ttl=60, backend=backend).get("Bonjour", "g") is None
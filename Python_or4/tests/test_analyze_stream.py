@@ -0,0 +1,48 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("fr_core_news_md")
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIRECTORY = os.path.join(SOURCE_DIRECTORY, "..", "public", "base")
+DATA_FILES = ["intents_and_questions.json", "intents_and_responses.json", "glossary.json", "clusters.json", "statistics.json"]
+
+
+def tree_digest(directory):
+    digests = {}
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), "rb") as f:
+            digests[name] = hashlib.sha1(f.read()).hexdigest()
+    return digests
+
+
+def test_cli_only_reads_the_knowledge_base(tmp_path):
+    # Même arborescence que le projet : le service lit ../public/base depuis son dossier de travail
+    data = tmp_path / "public" / "base"
+    work = tmp_path / "Python_or4"
+    data.mkdir(parents=True)
+    work.mkdir()
+    for name in DATA_FILES:
+        shutil.copy(os.path.join(DATA_DIRECTORY, name), data)
+    before = tree_digest(data)
+
+    result = subprocess.run(
+        [sys.executable, os.path.join(SOURCE_DIRECTORY, "analyze_stream.py")],
+        input='{"message": "Qu\'est-ce que l\'intelligence artificielle ?"}\nQuelle heure est-il ?\n',
+        capture_output=True, text=True, cwd=work, timeout=600,
+        env={**os.environ, "PYTHONPATH": SOURCE_DIRECTORY, "SPACY_STATISTICS_FLUSH": "0.1", "SPACY_CLUSTERING_INTERVAL": "0.1"}
+    )
+
+    assert result.returncode == 0, result.stderr
+    lines = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [line["message"] for line in lines] == ["Qu'est-ce que l'intelligence artificielle ?", "Quelle heure est-il ?"]
+    # Aucun fichier réécrit ni ajouté (journal, verrous) dans la base
+    assert tree_digest(data) == before
+    assert not os.path.exists(work / "statistics_sketch.npz")
+    assert not os.path.exists(work / "cluster_snapshots")
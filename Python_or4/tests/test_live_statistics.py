@@ -0,0 +1,81 @@
+import json
+import os
+import stat
+import threading
+
+from live_statistics import LiveStatistics
+
+
+def live_statistics(tmp_path, **kwargs):
+    return LiveStatistics(str(tmp_path / "statistics.json"), str(tmp_path / "statistics_sketch.npz"), **kwargs)
+
+
+def read(statistics):
+    with open(statistics.path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_flush_merges_every_shard_exactly(tmp_path):
+    statistics = live_statistics(tmp_path, shards=4)
+    n_threads, per_thread = 8, 250
+
+    def record():
+        for i in range(per_thread):
+            statistics.record("IA_definition" if i % 2 else "IA_applications", ["intelligence", f"mot{i % 5}"])
+
+    threads = [threading.Thread(target=record) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statistics.flush() == n_threads * per_thread
+    published = read(statistics)
+    assert published["requests"] == n_threads * per_thread
+    assert published["intents"] == {"IA_applications": 1000, "IA_definition": 1000}
+    assert published["keywords"]["intelligence"] == n_threads * per_thread
+    assert all(published["keywords"][f"mot{i}"] == 400 for i in range(5))
+    # Tout a été fusionné : un second passage n'ajoute rien
+    assert statistics.flush() == 0
+
+
+def test_flush_adds_to_published_counts(tmp_path):
+    statistics = live_statistics(tmp_path)
+    with open(statistics.path, "w", encoding="utf-8") as f:
+        json.dump({"intents": {"IA_definition": 42}, "keywords": {"intelligence": 50}}, f)
+
+    statistics.record("IA_definition", ["intelligence"])
+    statistics.flush()
+    statistics.record("IA_definition", ["intelligence"])
+    statistics.flush()
+
+    published = read(statistics)
+    assert published["intents"] == {"IA_definition": 44}
+    assert published["keywords"]["intelligence"] == 52
+    assert published["requests"] == 2
+
+
+def test_unknown_questions_are_counted_apart_from_intents(tmp_path):
+    statistics = live_statistics(tmp_path)
+
+    statistics.record("unknown", ["heure"])
+    statistics.record(None, [])
+    statistics.record("IA_definition", [])
+    statistics.flush()
+
+    published = read(statistics)
+    assert published["intents"] == {"IA_definition": 1}
+    assert published["unknown"] == 2
+    assert published["windows"]["buckets"][0]["unknown"] == 2
+
+
+def test_flush_keeps_file_mode(tmp_path):
+    statistics = live_statistics(tmp_path)
+    with open(statistics.path, "w", encoding="utf-8") as f:
+        json.dump({}, f)
+    os.chmod(statistics.path, 0o664)
+
+    statistics.record("IA_definition", ["intelligence"])
+    statistics.flush()
+
+    assert stat.S_IMODE(os.stat(statistics.path).st_mode) == 0o664
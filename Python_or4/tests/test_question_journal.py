@@ -0,0 +1,62 @@
+import json
+import os
+import stat
+
+from question_journal import QuestionJournal, write_json_atomic
+
+
+def file_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_write_json_atomic_keeps_mode(tmp_path):
+    path = tmp_path / "intents_and_questions.json"
+    path.write_text("[]", encoding="utf-8")
+    os.chmod(path, 0o664)
+
+    write_json_atomic(str(path), [{"text": "Bonjour", "intent": "salutation"}])
+
+    assert file_mode(path) == 0o664
+    assert json.loads(path.read_text(encoding="utf-8")) == [{"text": "Bonjour", "intent": "salutation"}]
+
+
+def test_write_json_atomic_new_file_is_world_readable(tmp_path):
+    path = tmp_path / "statistics.json"
+
+    write_json_atomic(str(path), {})
+
+    assert file_mode(path) == 0o644
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".tmp-")]
+
+
+def test_compact_merges_journal_without_duplicates(tmp_path):
+    corpus = tmp_path / "intents_and_questions.json"
+    corpus.write_text(json.dumps([{"text": "Qu'est-ce que l'IA ?", "intent": "IA_definition"}]), encoding="utf-8")
+    os.chmod(corpus, 0o664)
+    journal = QuestionJournal(str(tmp_path / "unknown_questions.ndjson"), str(corpus))
+
+    for text in ["Qu'est-ce que l'IA ?", "Quelle heure est-il ?", "Quelle heure est-il ?"]:
+        journal.append({"text": text, "intent": "unknown"})
+    assert journal.flush() == 3
+
+    assert journal.compact() == 1
+    assert [entry["text"] for entry in json.loads(corpus.read_text(encoding="utf-8"))] == [
+        "Qu'est-ce que l'IA ?", "Quelle heure est-il ?"
+    ]
+    assert file_mode(corpus) == 0o664
+    # Journal et fichier de compactage consommés : un second passage n'ajoute rien
+    assert not os.path.exists(journal.path)
+    assert not os.path.exists(journal.path + ".compacting")
+    assert journal.compact() == 0
+
+
+def test_compact_resumes_interrupted_compaction(tmp_path):
+    corpus = tmp_path / "intents_and_questions.json"
+    corpus.write_text("[]", encoding="utf-8")
+    journal = QuestionJournal(str(tmp_path / "unknown_questions.ndjson"), str(corpus))
+    # Compactage interrompu après le renommage, avec une dernière ligne incomplète
+    with open(journal.path + ".compacting", "w", encoding="utf-8") as f:
+        f.write('{"text": "Bonjour", "intent": "unknown"}\n{"text": "Bon')
+
+    assert journal.compact() == 1
+    assert json.loads(corpus.read_text(encoding="utf-8")) == [{"text": "Bonjour", "intent": "unknown"}]
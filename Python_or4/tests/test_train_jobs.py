@@ -0,0 +1,46 @@
+import multiprocessing
+import os
+
+import pytest
+
+from train_jobs import JOB_ID_PATTERN, JobPending, TrainJobs
+
+EXAMPLES = [{"text": "Qu'est-ce que l'IA ?", "intent": "IA_definition"}]
+
+
+def submit(directory, barrier, results):
+    jobs = TrainJobs(directory, "fr_core_news_md", publish=None)
+    barrier.wait()
+    try:
+        results.put(("created", jobs.submit(EXAMPLES)["id"]))
+    except JobPending as e:
+        results.put(("pending", e.job["id"]))
+
+
+def test_submit_refuses_a_second_job_while_one_is_pending(tmp_path):
+    jobs = TrainJobs(str(tmp_path), "fr_core_news_md", publish=None)
+    job = jobs.submit(EXAMPLES)
+
+    with pytest.raises(JobPending) as raised:
+        jobs.submit(EXAMPLES)
+
+    assert raised.value.job["id"] == job["id"]
+    assert jobs.get(job["id"])["status"] == "queued"
+
+
+def test_concurrent_submits_from_several_processes_create_one_job(tmp_path):
+    context = multiprocessing.get_context("fork")
+    n_processes = 6
+    barrier = context.Barrier(n_processes)
+    results = context.Queue()
+    processes = [context.Process(target=submit, args=(str(tmp_path), barrier, results)) for _ in range(n_processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+
+    outcomes = [results.get(timeout=5) for _ in processes]
+    created = [job_id for outcome, job_id in outcomes if outcome == "created"]
+    assert len(created) == 1
+    assert {job_id for _, job_id in outcomes} == set(created)
+    assert [name for name in os.listdir(tmp_path) if JOB_ID_PATTERN.match(name)] == created
@@ -0,0 +1,73 @@
+import threading
+import numpy as np
+from collections import Counter
+
+
+class TfidfIndex:
+    """
+    Table IDF persistante sur le corpus lemmatisé.
+
+    Les fréquences documentaires sont calculées une seule fois par génération
+    du corpus et complétées de façon incrémentale quand des questions sont
+    ajoutées à la fin. Le score d'un message se résume ensuite à des lectures
+    dans le dictionnaire et à un produit de vecteurs.
+    La formule reprend celle de TfidfVectorizer (smooth_idf, norme L2).
+    """
+
+    def __init__(self, analyzer):
+        # analyzer : fonction qui reçoit une liste de textes et renvoie, pour chacun, l'ensemble de ses termes
+        self.analyzer = analyzer
+        # (fréquences documentaires, nombre de documents), remplacés ensemble
+        self._table = (Counter(), 0)
+        self._corpus = []
+        self._lock = threading.Lock()
+
+    @property
+    def n_docs(self):
+        return self._table[1]
+
+    def sync(self, corpus):
+        """
+        Aligne l'index sur le corpus : ajout des seules nouvelles entrées si le
+        corpus a été complété, reconstruction complète sinon.
+        """
+        if corpus is self._corpus:
+            return
+        with self._lock:
+            if corpus is self._corpus:
+                return
+            indexed = len(self._corpus)
+            if len(corpus) >= indexed and corpus[:indexed] == self._corpus:
+                self._table = self._extend(self._table, corpus[indexed:])
+            else:
+                self._table = self._extend((Counter(), 0), corpus)
+            self._corpus = corpus
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+
+    def _extend(self, table, texts):
+        doc_freq, n_docs = table
+        if not texts:
+            return table
+        doc_freq = Counter(doc_freq)
+        for terms in self.analyzer(texts):
+            doc_freq.update(terms)
+            n_docs += 1
+        return doc_freq, n_docs
+
+    def scores(self, term_counts, vocabulary):
+        """
+        Score TF-IDF normalisé de chaque terme du vocabulaire pour un message,
+        à partir du nombre d'occurrences de ses termes.
+        """
+        if not vocabulary:
+            return {}
+        doc_freq, n_docs = self._table
+        tf = np.array([term_counts.get(term, 0) for term in vocabulary], dtype="float64")
+        df = np.array([doc_freq.get(term, 0) for term in vocabulary], dtype="float64")
+        weights = tf * (np.log((1 + n_docs) / (1 + df)) + 1)
+        norm = np.linalg.norm(weights)
+        if norm > 0:
+            weights /= norm
+        return dict(zip(vocabulary, weights.tolist()))
@@ -0,0 +1,254 @@
+import fcntl
+import json
+import os
+import random
+import re
+import shutil
+import threading
+import time
+import uuid
+
+import spacy
+from spacy.training.example import Example
+from spacy.util import compounding, minibatch
+
+from question_journal import file_lock, write_json_atomic
+
+# Statuts d'un job : en attente, en cours, terminé, échoué
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobPending(Exception):
+    """
+    Levée quand un job est déjà en attente ou en cours : les nouveaux exemples
+    ne sont pas enregistrés, `job` est l'état du job existant.
+    """
+
+    def __init__(self, job):
+        super().__init__(job["id"])
+        self.job = job
+
+
+class TrainJobs:
+    """
+    Entraînements de la classification de textes exécutés hors des requêtes HTTP.
+
+    Chaque job est un dossier <directory>/<job_id> : exemples figés au moment de la
+    demande (examples.json), état et courbes de perte (state.json) et point de
+    reprise écrit après chaque époque. Un job interrompu (arrêt, crash) reprend à
+    la dernière époque terminée. Un verrou de fichier garantit qu'un seul processus
+    entraîne à la fois ; n'importe quel processus peut lire l'état d'un job.
+
+    Le modèle final est transmis à publish, qui renvoie l'identifiant de la
+    version publiée (voir ModelVersions).
+    """
+
+    def __init__(self, directory, base_model, publish, losses_file=None,
+                 epochs=20, learn_rate=0.001, interval=5.0):
+        self.directory = directory
+        self.base_model = base_model
+        self.publish = publish
+        self.losses_file = losses_file
+        self.epochs = epochs
+        self.learn_rate = learn_rate
+        self.interval = interval
+        self._started = False
+        self._reset()
+
+    def _reset(self):
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def submit(self, training_data):
+        """
+        Enregistre un job et renvoie son état. Si un job est déjà en attente ou
+        en cours, lève JobPending sans enregistrer les exemples. La vérification et
+        la création se font sous verrou de fichier, tous processus confondus.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        # Verrou distinct de runner.lock, tenu pendant tout un entraînement
+        with self._lock, file_lock(os.path.join(self.directory, "submit")):
+            pending = self._pending_jobs()
+            if pending:
+                raise JobPending(pending[0])
+
+            job_id = uuid.uuid4().hex
+            path = self._job_path(job_id)
+            os.makedirs(path)
+            write_json_atomic(os.path.join(path, "examples.json"), training_data)
+            now = time.time()
+            state = {
+                "id": job_id,
+                "status": QUEUED,
+                "created_at": now,
+                "updated_at": now,
+                "examples": len(training_data),
+                "epochs": self.epochs,
+                "epoch": 0,
+                "losses": [],
+                "checkpoint": None,
+                "version": None,
+                "error": None
+            }
+            write_json_atomic(os.path.join(path, "state.json"), state)
+        self._wake.set()
+        return state
+
+    def get(self, job_id):
+        """
+        État d'un job, None s'il n'existe pas.
+        """
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        return self._read_state(job_id)
+
+    def start(self):
+        """
+        Lance le thread qui exécute les jobs en attente et reprend les jobs interrompus.
+        """
+        if self._started:
+            return
+        self._started = True
+        threading.Thread(target=self._run_loop, name="train-jobs", daemon=True).start()
+
+    def after_fork(self):
+        started = self._started
+        self._started = False
+        self._reset()
+        if started:
+            self.start()
+
+    def _job_path(self, job_id):
+        return os.path.join(self.directory, job_id)
+
+    def _read_state(self, job_id):
+        try:
+            with open(os.path.join(self._job_path(job_id), "state.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_state(self, state):
+        state["updated_at"] = time.time()
+        write_json_atomic(os.path.join(self._job_path(state["id"]), "state.json"), state)
+
+    def _pending_jobs(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        states = [self._read_state(name) for name in names if JOB_ID_PATTERN.match(name)]
+        pending = [state for state in states if state and state["status"] in (QUEUED, RUNNING)]
+        return sorted(pending, key=lambda state: state["created_at"])
+
+    def _run_loop(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self._run_pending()
+            except OSError as e:
+                print(f"Erreur lors de l'exécution des entraînements: {e}")
+
+    def _run_pending(self):
+        if not self._pending_jobs():
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "runner.lock"), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Un autre processus entraîne déjà
+                return
+            try:
+                # Relire sous verrou : un autre processus a pu terminer un job entre-temps
+                pending = self._pending_jobs()
+                while pending:
+                    self._run(pending[0])
+                    pending = self._pending_jobs()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _run(self, state):
+        path = self._job_path(state["id"])
+        try:
+            with open(os.path.join(path, "examples.json"), "r", encoding="utf-8") as f:
+                training_data = json.load(f)
+
+            if state["checkpoint"]:
+                nlp = spacy.load(os.path.join(path, state["checkpoint"]))
+                examples = self._examples(nlp, training_data)
+            else:
+                nlp = spacy.load(self.base_model)
+                examples = self._examples(nlp, training_data)
+                # Le modèle de base n'a pas de composant de classification :
+                # sans lui, les annotations "cats" ne produisent aucune perte
+                if "textcat" not in nlp.pipe_names:
+                    nlp.add_pipe("textcat", last=True)
+                nlp.get_pipe("textcat").initialize(lambda: examples, nlp=nlp)
+
+            state["status"] = RUNNING
+            self._write_state(state)
+
+            optimizer = nlp.create_optimizer()
+            optimizer.learn_rate = self.learn_rate
+            # Lots de taille croissante (4 à 32 exemples)
+            sizes = compounding(4.0, 32.0, 1.001)
+            for epoch in range(state["epoch"], state["epochs"]):
+                # Mélange de l'ordre initial, déterminé par le job et l'époque seuls :
+                # une reprise rejoue le même mélange que l'entraînement interrompu
+                order = list(examples)
+                random.Random(f"{state['id']}-{epoch}").shuffle(order)
+                losses = {}
+                # Seul le classificateur apprend, les autres composants restent ceux du modèle de base
+                with nlp.select_pipes(enable="textcat"):
+                    for batch in minibatch(order, size=sizes):
+                        nlp.update(batch, sgd=optimizer, losses=losses)
+                print(f"Job {state['id']}, Epoch {epoch+1}, Loss: {losses}")
+                self._checkpoint(nlp, state, epoch + 1, losses)
+
+            state["version"] = self.publish(nlp)
+            if self.losses_file:
+                write_json_atomic(self.losses_file, state["losses"])
+            # Le modèle publié remplace le point de reprise
+            checkpoint, state["checkpoint"] = state["checkpoint"], None
+            state["status"] = COMPLETED
+            self._write_state(state)
+            if checkpoint:
+                shutil.rmtree(os.path.join(path, checkpoint), ignore_errors=True)
+        except Exception as e:
+            print(f"Échec de l'entraînement {state['id']}: {e}")
+            state["status"] = FAILED
+            state["error"] = str(e)
+            self._write_state(state)
+
+    def _examples(self, nlp, training_data):
+        labels = sorted({item["intent"] for item in training_data})
+        return [
+            Example.from_dict(
+                nlp.make_doc(item["text"]),
+                {"cats": {label: 1.0 if label == item["intent"] else 0.0 for label in labels}}
+            )
+            for item in training_data
+        ]
+
+    def _checkpoint(self, nlp, state, epoch, losses):
+        """
+        Écrit le point de reprise de l'époque puis l'état qui le référence ;
+        le point de reprise précédent n'est supprimé qu'ensuite.
+        """
+        path = self._job_path(state["id"])
+        previous = state["checkpoint"]
+        name = f"checkpoint-{epoch}"
+        nlp.to_disk(os.path.join(path, name))
+        state["checkpoint"] = name
+        state["epoch"] = epoch
+        state["losses"].append(losses)
+        self._write_state(state)
+        if previous and previous != name:
+            shutil.rmtree(os.path.join(path, previous), ignore_errors=True)
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Version du format de la table sur disque
+VECTOR_TABLE_VERSION = 1
+VECTORS_FILE = "vectors.f32"
+
+
+def vector_arrays(vectors):
+    """
+    Données de la table de vecteurs spaCy : matrice float32 contiguë, clés
+    (empreintes des chaînes) triées et ligne de chaque clé.
+    """
+    data = np.ascontiguousarray(vectors.data, dtype="float32")
+    keys = np.fromiter(vectors.key2row.keys(), dtype="uint64", count=len(vectors.key2row))
+    rows = np.fromiter(vectors.key2row.values(), dtype="int32", count=len(vectors.key2row))
+    order = np.argsort(keys)
+    return data, keys[order], rows[order]
+
+
+def export_vector_table(vectors, directory):
+    """
+    Écrit la table dans directory/<empreinte du contenu> si elle n'y est pas déjà
+    et renvoie son dossier. Les processus qui chargent le même modèle retrouvent
+    ainsi les mêmes fichiers.
+    """
+    data, keys, rows = vector_arrays(vectors)
+    digest = hashlib.sha1()
+    for array in (data, keys, rows):
+        digest.update(memoryview(array))
+    target = os.path.join(directory, digest.hexdigest()[:16])
+    if os.path.isdir(target):
+        return target
+
+    os.makedirs(directory, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".tmp-", dir=directory)
+    try:
+        os.chmod(staging, 0o755)
+        data.tofile(os.path.join(staging, VECTORS_FILE))
+        np.save(os.path.join(staging, "keys.npy"), keys)
+        np.save(os.path.join(staging, "rows.npy"), rows)
+        meta = {"version": VECTOR_TABLE_VERSION, "rows": data.shape[0], "width": data.shape[1], "keys": len(keys)}
+        with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.rename(staging, target)
+    except OSError:
+        # Un autre processus a publié la même table entre-temps
+        shutil.rmtree(staging, ignore_errors=True)
+        if not os.path.isdir(target):
+            raise
+    return target
+
+
+class VectorTable:
+    """
+    Table de vecteurs statiques projetée en mémoire (numpy.memmap, lecture seule) :
+    les pages sont partagées par tous les processus qui l'ouvrent. L'index trié
+    des empreintes de chaînes donne la ligne d'un mot sans dictionnaire Python.
+    """
+
+    def __init__(self, data, keys, rows, path):
+        self.data = data
+        self.keys = keys
+        self.rows = rows
+        self.path = path
+        self.width = data.shape[1]
+
+    @classmethod
+    def load(cls, path):
+        """
+        Ouvre la table du dossier, None si elle est absente ou d'une autre version.
+        """
+        try:
+            with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if meta.get("version") != VECTOR_TABLE_VERSION:
+            return None
+        data = np.memmap(os.path.join(path, VECTORS_FILE), dtype="float32", mode="r", shape=(meta["rows"], meta["width"]))
+        keys = np.load(os.path.join(path, "keys.npy"), mmap_mode="r")
+        rows = np.load(os.path.join(path, "rows.npy"), mmap_mode="r")
+        return cls(data, keys, rows, path)
+
+    @classmethod
+    def attached(cls, vocab):
+        """
+        Table dont les données sont celles du vocabulaire (voir attach_vector_table), sinon None.
+        """
+        data = vocab.vectors.data
+        if not isinstance(data, np.memmap) or not data.filename:
+            return None
+        return cls.load(os.path.dirname(data.filename))
+
+    def row(self, key):
+        """
+        Ligne du vecteur de la clé (empreinte de chaîne spaCy), -1 si le mot n'a pas de vecteur.
+        """
+        index = int(np.searchsorted(self.keys, key))
+        if index < len(self.keys) and self.keys[index] == key:
+            return int(self.rows[index])
+        return -1
+
+    def get(self, key):
+        """
+        Vecteur de la clé sans copie (vue en lecture seule), None s'il n'existe pas.
+        """
+        row = self.row(key)
+        return self.data[row] if row >= 0 else None
+
+
+def attach_vector_table(nlp, directory):
+    """
+    Exporte au besoin la table de vecteurs du modèle puis remplace sa copie en mémoire
+    par la projection du fichier : Token.vector, Doc.vector et les couches du
+    pipeline lisent alors les pages partagées. Renvoie la table, None si le modèle
+    n'a pas de vecteurs.
+    """
+    vectors = nlp.vocab.vectors
+    if vectors.data.size == 0 or not len(vectors.key2row):
+        return None
+    table = VectorTable.load(export_vector_table(vectors, directory))
+    vectors.data = table.data
+    return table
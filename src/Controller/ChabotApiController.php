@@ -153,10 +153,11 @@ class ChabotApiController extends AbstractController
 
 
     #[Route('/api/explore_clusters', name: 'explore_clusters', methods: ['GET'])]
-    public function exploreClusters(): JsonResponse
+    public function exploreClusters(Request $request): JsonResponse
     {
         try {
-            $clusters = $this->spacyService->getClusters();
+            $page = $request->query->has('page') ? $request->query->getInt('page', 1) : null;
+            $clusters = $this->spacyService->getClusters($page, $request->query->getInt('per_page', 20));
             return new JsonResponse($clusters, Response::HTTP_OK,
                 ['Content-Type' => 'application/json; charset=utf-8']);
         } catch (\Exception $e) {
@@ -295,8 +296,8 @@ class ChabotApiController extends AbstractController
             return new JsonResponse(['error' => 'Keyword is required'], 400);
         }
 
-        // Génère des mots-clés liés à partir de spaCy
-        $relatedKeywords = $spacyService->extractKeywords($keyword);
+        // Mots les plus proches dans l'espace des vecteurs de spaCy
+        $relatedKeywords = $spacyService->relatedKeywords($keyword);
 
         $keywordsForD3 = array_map(fn($keyword) => [
             'keyword' => $keyword,
@@ -36,6 +36,15 @@ class TrainController extends AbstractController
             'http://localhost:5000/train' // Appel API Python pour entraîner
         );
         dump($response);
+
+        // 409 : un entraînement est déjà en attente ou en cours, on renvoie ce job
+        if ($response->getStatusCode() === Response::HTTP_CONFLICT) {
+            return new JsonResponse([
+                'message' => 'Training already queued or running.',
+                'details' => $response->toArray(false),
+            ], Response::HTTP_CONFLICT);
+        }
+
         return new JsonResponse([
             'message' => 'Training triggered successfully.',
             'details' => $response->toArray(),
@@ -48,6 +48,20 @@ class SpacyService
         }
     }
 
+    public function relatedKeywords(string $keyword, int $limit = 10): array
+    {
+        try {
+            $response = $this->httpClient->post('/related_keywords', [
+                'json' => ['keyword' => $keyword, 'limit' => $limit]
+            ]);
+
+            $data = json_decode($response->getBody()->getContents(), true);
+            return array_column($data['related'] ?? [], 'keyword');
+        } catch (RequestException $e) {
+            throw new \RuntimeException("Erreur lors de la communication avec spaCy: " . $e->getMessage());
+        }
+    }
+
     public function getGlossaryDefinition(string $term): array
     {
         try {
@@ -125,12 +139,13 @@ class SpacyService
 
     }
 
-    public function getClusters()
+    public function getClusters(?int $page = null, int $perPage = 20)
     {
 
         try {
-            // Envoi de la requête au service Flask
-            $response = $this->httpClient->get('/explore_clusters');  // Contenu brut
+            // Envoi de la requête au service Flask ; avec une page, groupes détaillés et paginés
+            $options = $page !== null ? ['query' => ['page' => $page, 'per_page' => $perPage]] : [];
+            $response = $this->httpClient->get('/explore_clusters', $options);  // Contenu brut
             $content= $response->getBody()->getContents();
             return json_decode($content, true);
 